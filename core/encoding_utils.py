@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+编码快速判断工具
+通过BOM和严格试解码判断常见中文小说文件的编码，无需chardet
+"""
+
+import codecs
+from typing import Iterable, Optional
+
+def can_decode(raw_data: bytes, encoding: str) -> bool:
+    """判断字节样本能否按指定编码严格解码（容忍样本末尾被截断的多字节字符）"""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(raw_data, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def bom_encoding(raw_data: bytes) -> Optional[str]:
+    """根据BOM判断编码，没有BOM时返回None"""
+    if raw_data.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    # UTF-32 LE 的BOM以UTF-16 LE的BOM开头，需要先判断
+    if raw_data.startswith((codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)):
+        return 'utf-32'
+    if raw_data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    return None
+
+def sniff_encoding(head: bytes, candidates: Iterable[str] = ('utf-8', 'gbk')) -> Optional[str]:
+    """
+    根据文件开头的字节样本快速判断编码
+
+    先检查BOM，再按顺序对候选编码严格试解码（中文小说绝大多数是UTF-8或GBK编码）。
+
+    Args:
+        head: 文件开头的字节样本
+        candidates: 依次尝试的候选编码
+
+    Returns:
+        Optional[str]: 编码名称，无法判断时返回None
+    """
+    encoding = bom_encoding(head)
+    if encoding:
+        return encoding
+    for encoding in candidates:
+        if can_decode(head, encoding):
+            return encoding
+    return None
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件复制工具
+支持 os.copy_file_range 时在内核中完成复制，否则交给 shutil.copyfile
+（Linux上使用sendfile、macOS上使用fcopyfile，其他平台分块复制）
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import Union
+
+# copy_file_range 每次调用复制的字节数
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+def _copy_file_range(fsrc, fdst) -> bool:
+    """使用 os.copy_file_range 复制全部内容（支持reflink的文件系统上无需复制数据），不可用时返回False"""
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    try:
+        while os.copy_file_range(fsrc.fileno(), fdst.fileno(), _COPY_CHUNK_SIZE):
+            pass
+        return True
+    except OSError:
+        # 文件系统不支持（如跨文件系统的旧内核），由调用方改用其他方式重新复制
+        return False
+
+def copy_file(src: Union[str, Path], dst: Union[str, Path]):
+    """
+    复制文件内容及元数据（与 shutil.copy2 相同）
+
+    复制失败时删除不完整的目标文件；源文件无法打开时不会创建或改动目标文件。
+
+    Args:
+        src: 源文件路径
+        dst: 目标文件路径
+    """
+    with open(src, 'rb') as fsrc:
+        try:
+            with open(dst, 'wb') as fdst:
+                copied = _copy_file_range(fsrc, fdst)
+            if not copied:
+                shutil.copyfile(src, dst)
+            shutil.copystat(src, dst)
+        except BaseException:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+            raise
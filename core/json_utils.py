@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON写入工具
+安装了orjson时使用其加速序列化，否则使用标准库json
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+def dumps_json(data: Any, indent: bool = True) -> bytes:
+    """
+    将数据序列化为UTF-8编码的JSON字节串（保留中文，不转义）
+
+    Args:
+        data: 要序列化的数据
+        indent: 是否缩进两个空格输出
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+def write_json_atomic(file_path: Union[str, Path], data: Any, indent: bool = True):
+    """
+    写入JSON文件：先写入同目录下的临时文件再替换目标文件，避免留下写了一半的文件
+
+    Args:
+        file_path: 目标文件路径
+        data: 要写入的数据
+        indent: 是否缩进两个空格输出
+    """
+    file_path = Path(file_path)
+    temp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(dumps_json(data, indent))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        raise
@@ -8,11 +8,14 @@
 import os
 import glob
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from novel_statistics import get_classification_statistics
 
 class BatchProcessor:
-    def __init__(self, base_path="小说库/00-二次确认"):
+    def __init__(self, base_path="小说库/00-二次确认", max_workers=None):
         self.base_path = base_path
+        # 并发提取的工作线程数（每个任务本身是独立的 txt_preview 子进程）
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
         self.analysis_path = os.path.join(base_path, "analysis")
         self.processed_files = []
         self.failed_files = []
@@ -62,26 +65,35 @@ class BatchProcessor:
         
         self.processing_start_time = self.get_current_time()
         
-        for i, file_path in enumerate(pending_files, 1):
-            filename = os.path.basename(file_path)
-            print(f"🔍 [{i}/{len(pending_files)}] 处理: {filename}")
+        total = len(pending_files)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 调用 txt_preview.py 并发提取内容，按完成顺序实时汇报进度
+            futures = {
+                executor.submit(
+                    self._extract_file_content,
+                    file_path,
+                    os.path.join(self.analysis_path, os.path.basename(file_path))
+                ): file_path
+                for file_path in pending_files
+            }
             
-            try:
-                # 调用 txt_preview.py 提取内容
-                analysis_file = os.path.join(self.analysis_path, filename)
-                success = self._extract_file_content(file_path, analysis_file)
+            for i, future in enumerate(as_completed(futures), 1):
+                filename = os.path.basename(futures[future])
+                
+                try:
+                    success = future.result()
+                except Exception as e:
+                    self.failed_files.append(filename)
+                    print(f"🔍 [{i}/{total}] ❌ {filename} - 处理异常: {e}")
+                    continue
                 
                 if success:
                     self.processed_files.append(filename)
-                    print(f"   ✅ 成功提取内容")
+                    print(f"🔍 [{i}/{total}] ✅ {filename}")
                 else:
                     self.failed_files.append(filename)
-                    print(f"   ❌ 提取失败")
-                    
-            except Exception as e:
-                self.failed_files.append(filename)
-                print(f"   ❌ 处理异常: {e}")
-                
+                    print(f"🔍 [{i}/{total}] ❌ {filename}")
+        
         # 生成处理报告
         self._generate_processing_report()
         return len(self.failed_files) == 0
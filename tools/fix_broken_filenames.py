@@ -7,7 +7,6 @@
 
 import os
 import sys
-import glob
 import shutil
 from pathlib import Path
 
@@ -19,38 +18,44 @@ def detect_broken_files(directory):
         print(f"❌ 目录不存在: {directory}")
         return broken_files
     
-    for file_path in glob.glob(os.path.join(directory, "*.txt")):
-        filename = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
-        
-        # 检测可能的问题
-        issues = []
-        
-        # 1. 检查0字节文件
-        if file_size == 0:
-            issues.append("0字节文件")
-        
-        # 2. 检查文件名不完整（以【得分接近 结尾但没有完整的评分信息）
-        if "【得分接近" in filename and not filename.endswith("】.txt"):
-            issues.append("文件名不完整")
-        
-        # 3. 检查文件名以【开头但没有结尾】
-        if "【" in filename and not "】" in filename:
-            issues.append("缺少文件名结尾")
-        
-        if issues:
-            broken_files.append({
-                'path': file_path,
-                'filename': filename,
-                'size': file_size,
-                'issues': issues
-            })
+    # 单次 scandir 遍历：文件类型与大小直接取自 DirEntry，避免额外的 stat 调用
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".txt") or not entry.is_file(follow_symlinks=False):
+                continue
+            
+            file_path = entry.path
+            filename = entry.name
+            file_size = entry.stat(follow_symlinks=False).st_size
+            
+            # 检测可能的问题
+            issues = []
+            
+            # 1. 检查0字节文件
+            if file_size == 0:
+                issues.append("0字节文件")
+            
+            # 2. 检查文件名不完整（以【得分接近 结尾但没有完整的评分信息）
+            if "【得分接近" in filename and not filename.endswith("】.txt"):
+                issues.append("文件名不完整")
+            
+            # 3. 检查文件名以【开头但没有结尾】
+            if "【" in filename and not "】" in filename:
+                issues.append("缺少文件名结尾")
+            
+            if issues:
+                broken_files.append({
+                    'path': file_path,
+                    'filename': filename,
+                    'size': file_size,
+                    'issues': issues
+                })
     
     return broken_files
 
 def suggest_filename_fix(filename):
     """建议修复的文件名"""
-    if "【得分接近" in filename and not filename.endswith(】.txt"):
+    if "【得分接近" in filename and not filename.endswith("】.txt"):
         # 补全评分区间标记
         if filename.endswith("【得分接近"):
             return filename + " (15分)】.txt"
@@ -7,8 +7,8 @@
 
 import os
 import sys
-import glob
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # 设置标准输出编码，避免在Windows上的编码问题
 if sys.platform.startswith('win'):
@@ -25,47 +25,63 @@ if sys.platform.startswith('win'):
 
 def count_files_in_directory(directory_path):
     """统计目录中的txt文件数量"""
-    if not os.path.exists(directory_path):
+    count = 0
+    try:
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                # 与 glob("*.txt") 保持一致：忽略隐藏文件（如 macOS 的 ._ 文件）
+                if entry.name.endswith(".txt") and not entry.name.startswith(".") \
+                        and entry.is_file(follow_symlinks=False):
+                    count += 1
+    except OSError:
+        # 目录不存在或无权限读取时与 glob 一样按0个文件处理
         return 0
-    txt_files = glob.glob(os.path.join(directory_path, "*.txt"))
-    return len(txt_files)
+    return count
 
-def detect_novel_library_root(potential_path):
-    """智能检测小说库根目录"""
+def _scan_subdirs(directory_path):
+    """一次性列出目录下的子目录，返回 {名称: DirEntry}，目录不可读时返回空字典"""
+    try:
+        with os.scandir(directory_path) as entries:
+            return {entry.name: entry for entry in entries if entry.is_dir()}
+    except OSError:
+        return {}
+
+def _locate_library_root(potential_path):
+    """检测小说库根目录，同时返回根目录下的子目录以便统计时复用"""
     potential_path = os.path.normpath(potential_path)
     
     # 定义分类目录标识
     category_indicators = ["00-待分类", "00-二次确认", "01-玄幻", "02-奇幻", "03-武侠"]
     
-    # 检查当前路径是否直接包含分类目录
-    found_categories = 0
-    for indicator in category_indicators:
-        if os.path.exists(os.path.join(potential_path, indicator)):
-            found_categories += 1
+    # 检查当前路径是否直接包含分类目录（单次列目录后在内存中比对）
+    subdirs = _scan_subdirs(potential_path)
+    found_categories = sum(1 for indicator in category_indicators if indicator in subdirs)
     
     # 如果当前路径包含多个分类目录，则认为这是小说库根目录
     if found_categories >= 2:
-        return potential_path
+        return potential_path, subdirs
     
     # 否则检查是否存在"小说库"子目录
-    traditional_path = os.path.join(potential_path, "小说库")
-    if os.path.exists(traditional_path):
+    if "小说库" in subdirs:
+        traditional_path = subdirs["小说库"].path
         # 检查传统路径下是否有分类目录
-        traditional_found = 0
-        for indicator in category_indicators:
-            if os.path.exists(os.path.join(traditional_path, indicator)):
-                traditional_found += 1
+        traditional_subdirs = _scan_subdirs(traditional_path)
+        traditional_found = sum(1 for indicator in category_indicators if indicator in traditional_subdirs)
         
         if traditional_found >= 2:
-            return traditional_path
+            return traditional_path, traditional_subdirs
     
     # 如果都没找到，返回原路径
-    return potential_path
+    return potential_path, subdirs
+
+def detect_novel_library_root(potential_path):
+    """智能检测小说库根目录"""
+    return _locate_library_root(potential_path)[0]
 
 def get_classification_statistics(base_path="/Volumes/980pro/待整理/小说库"):
     """获取各分类的统计信息"""
     # 智能检测小说库根目录
-    base_path = detect_novel_library_root(base_path)
+    base_path, subdirs = _locate_library_root(base_path)
     print(f"🔍 检测到小说库根目录: {base_path}")
     
     categories = {
@@ -92,10 +108,18 @@ def get_classification_statistics(base_path="/Volumes/980pro/待整理/小说库
     print("📊 小说分类统计报告")
     print("=" * 50)
     
-    # 统计各分类文件数量
+    # 统计各分类文件数量（目录列举是 I/O 等待，多线程并发可显著缩短慢速卷上的耗时）
+    # 只统计根目录列表中实际存在的分类目录
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {
+            executor.submit(count_files_in_directory, subdirs[name].path): name
+            for name in categories if name in subdirs
+        }
+        file_counts = {futures[future]: future.result() for future in as_completed(futures)}
+    
     for folder_name, display_name in categories.items():
         folder_path = os.path.join(base_path, folder_name)
-        file_count = count_files_in_directory(folder_path)
+        file_count = file_counts.get(folder_name, 0)
         stats[folder_name] = {
             'name': display_name,
             'count': file_count,
@@ -125,12 +149,18 @@ def print_statistics_report(stats, total_files):
     print(f"{'排名':<4} {'分类':<12} {'文件数':<8} {'百分比':<8} {'状态'}")
     print("-" * 60)
     
+    # 在输出排名的同时累计处理进度，避免再次查找统计数据
+    pending_files = 0
+    unclassified_files = 0
+    
     for rank, (folder_name, data) in enumerate(sorted_stats, 1):
         status = ""
         if folder_name == "00-二次确认":
             status = "⚠️ 需处理"
+            pending_files = data['count']
         elif folder_name == "00-待分类":
             status = "📥 待分类"
+            unclassified_files = data['count']
         elif data['count'] == 0:
             status = "📭 空"
         else:
@@ -141,8 +171,6 @@ def print_statistics_report(stats, total_files):
     print("-" * 60)
     
     # 计算处理进度
-    pending_files = stats.get("00-二次确认", {}).get('count', 0)
-    unclassified_files = stats.get("00-待分类", {}).get('count', 0)
     classified_files = total_files - pending_files - unclassified_files
     
     if total_files > 0:
@@ -165,15 +193,20 @@ def print_detailed_analysis(stats):
             main_categories[folder_name] = data
     
     if main_categories:
-        main_total = sum(data['count'] for data in main_categories.values())
-        print(f"   主要分类总计：{main_total:,} 个文件")
-        
-        # 找出最大和最小的分类
-        max_category = max(main_categories.items(), key=lambda x: x[1]['count'])
-        min_category = min(main_categories.items(), key=lambda x: x[1]['count'])
+        # 一次遍历同时计算总数、最大和最小分类
+        main_total = 0
+        max_data = min_data = None
+        for data in main_categories.values():
+            count = data['count']
+            main_total += count
+            if max_data is None or count > max_data['count']:
+                max_data = data
+            if min_data is None or count < min_data['count']:
+                min_data = data
         
-        print(f"   最大分类：{max_category[1]['name']} ({max_category[1]['count']:,} 个)")
-        print(f"   最小分类：{min_category[1]['name']} ({min_category[1]['count']:,} 个)")
+        print(f"   主要分类总计：{main_total:,} 个文件")
+        print(f"   最大分类：{max_data['name']} ({max_data['count']:,} 个)")
+        print(f"   最小分类：{min_data['name']} ({min_data['count']:,} 个)")
         
         # 热门分类（超过平均值的分类）
         if main_total > 0:
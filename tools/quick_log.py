@@ -6,9 +6,43 @@
 
 import os
 import sys
+import atexit
 from datetime import datetime
 from pathlib import Path
 
+
+class _LogFiles:
+    """
+    日志文件句柄缓存
+    
+    为每个日志文件保持一个打开的文件句柄，避免每次追加都重新打开文件；
+    每条内容写入后立即刷新，进程退出时自动关闭。
+    """
+    
+    def __init__(self):
+        self._files = {}  # {path: file_handle}
+    
+    def write(self, file_path, content):
+        """追加一条日志内容并立即写入磁盘"""
+        file_handle = self._files.get(file_path)
+        if file_handle is None:
+            # 确保目录存在（每个文件只检查一次）
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            file_handle = self._files[file_path] = open(file_path, 'a', encoding='utf-8')
+        file_handle.write(content)
+        file_handle.flush()
+    
+    def close(self):
+        """关闭所有文件句柄"""
+        for file_handle in self._files.values():
+            file_handle.close()
+        self._files.clear()
+
+
+_log_files = _LogFiles()
+atexit.register(_log_files.close)
+
+
 def log_keywords(base_path, category, keywords_text, description=""):
     """
     快速记录新关键词
@@ -21,16 +55,12 @@ def log_keywords(base_path, category, keywords_text, description=""):
     """
     file_path = os.path.join(base_path, "new_keywords_discovered.txt")
     
-    # 确保目录存在
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
     content = f"\n## {category}关键词补充 - {timestamp}\n{keywords_text}\n"
     if description:
         content += f"# {description}\n"
     
-    with open(file_path, 'a', encoding='utf-8') as f:
-        f.write(content)
+    _log_files.write(file_path, content)
     
     print(f"✅ 已记录{category}关键词")
 
@@ -50,9 +80,6 @@ def log_classification(base_path, filename, title, category, reason, keywords=""
     """
     file_path = os.path.join(base_path, "logs", "manual_classification_log.txt")
     
-    # 确保目录存在
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
     content = f"""
 ### 文件：{filename}
@@ -65,8 +92,7 @@ def log_classification(base_path, filename, title, category, reason, keywords=""
 
 """
     
-    with open(file_path, 'a', encoding='utf-8') as f:
-        f.write(content)
+    _log_files.write(file_path, content)
     
     print(f"✅ 已记录分类日志：{title} → {category}")
 
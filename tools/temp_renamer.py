@@ -7,67 +7,156 @@
 
 import os
 import re
-import chardet
 import sys
 from pathlib import Path
 
+# 以脚本方式运行时项目根目录不在模块搜索路径中
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+from core.encoding_utils import sniff_encoding
+
+# 常见的书名模式
+_TITLE_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'《(.+?)》',  # 《书名》
+    r'书名[:：]\s*(.+)',  # 书名: 书名
+    r'篇名[:：]\s*(.+)',  # 篇名: 书名
+    r'作品[:：]\s*(.+)',  # 作品: 书名
+    r'小说[:：]\s*(.+)',  # 小说: 书名
+    r'标题[:：]\s*(.+)',  # 标题: 书名
+    r'题目[:：]\s*(.+)',  # 题目: 书名
+    r'^(.+?)\s*作者[:：]',  # 书名 作者:
+    r'^(.+?)\s*著',  # 书名 著
+    r'第一章\s*(.+)',  # 第一章 章节名（可能包含书名）
+))
+
+# 所有书名模式的合并正则：大多数正文行不匹配任何模式，一次搜索即可跳过
+_ANY_TITLE_RE = re.compile('|'.join(f'(?:{p.pattern})' for p in _TITLE_PATTERNS), re.IGNORECASE)
+
+# 行首的章节号和序号
+_CHAPTER_PREFIX_RE = re.compile(r'^第[一二三四五六七八九十\d]+[章节]')
+_NUMBER_PREFIX_RE = re.compile(r'^\d+\.')
+
+# 书名中常见的无关词汇，合并为单个正则以便一次扫描完成替换
+_UNWANTED_RE = re.compile('|'.join(f'(?:{p})' for p in (
+    r'第[一二三四五六七八九十\d]+[章节].*',
+    r'^\d+\..*',
+    r'正文.*',
+    r'序章.*',
+    r'楔子.*',
+    r'前言.*',
+    r'目录.*',
+    r'内容简介.*',
+    r'作者.*',
+    r'www\..*',
+    r'http.*',
+    r'来源.*',
+    r'转载.*',
+    r'整理.*',
+    r'校对.*',
+    r'txt.*',
+)), re.IGNORECASE)
+
+_SPECIAL_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 明显不是书名的内容，合并为单个正则配合 match 使用
+_INVALID_RE = re.compile('|'.join(f'(?:{p})' for p in (
+    r'^\d+$',  # 纯数字
+    r'^第\d+章',  # 第X章
+    r'^chapter\s*\d+',  # chapter X
+    r'^www\.',  # 网址
+    r'^http',  # 网址
+    r'^\s*$',  # 空白
+    r'^[a-zA-Z]+$',  # 纯英文字母
+    r'^[\W]+$',  # 纯特殊字符
+)), re.IGNORECASE)
+
+# 中文字符的字节特征
+_UTF8_CJK_RE = re.compile(rb'[\xe4-\xe9][\x80-\xbf][\x80-\xbf]')
+_GBK_PAIR_RE = re.compile(rb'[\x81-\xfe][\x40-\xfe]')
+
+def _guess_chinese_encoding(raw_data, min_coverage=0.5):
+    """
+    根据中文字节特征的密度估计编码，用于样本中夹杂少量坏字节、严格解码失败的情况
+    
+    UTF-8中文为 [E4-E9][80-BF][80-BF] 三字节序列，GBK中文为 [81-FE][40-FE] 双字节序列。
+    """
+    if not raw_data:
+        return None
+    utf8_bytes = len(_UTF8_CJK_RE.findall(raw_data)) * 3
+    if utf8_bytes >= len(raw_data) * min_coverage:
+        return 'utf-8'
+    gbk_bytes = len(_GBK_PAIR_RE.findall(raw_data)) * 2
+    if gbk_bytes >= len(raw_data) * min_coverage:
+        return 'gbk'
+    return None
+
+def _detect_encoding_from_bytes(raw_data):
+    """根据字节样本检测编码"""
+    encoding = sniff_encoding(raw_data) or _guess_chinese_encoding(raw_data)
+    if encoding:
+        return encoding
+    
+    # 快速判断失败时才使用chardet（延迟导入，多数文件无需加载）
+    import chardet
+    result = chardet.detect(raw_data)
+    return result['encoding'] if result['confidence'] > 0.7 else 'utf-8'
+
 def detect_encoding(file_path):
     """检测文件编码"""
     try:
         with open(file_path, 'rb') as f:
             raw_data = f.read(10000)  # 读取前10KB来检测编码
-            result = chardet.detect(raw_data)
-            return result['encoding'] if result['confidence'] > 0.7 else 'utf-8'
+        return _detect_encoding_from_bytes(raw_data)
     except:
         return 'utf-8'
 
-def read_file_content(file_path, max_lines=50):
+def read_file_content(file_path, max_lines=50, read_size=65536):
     """读取文件前几行内容"""
-    encoding = detect_encoding(file_path)
     try:
-        with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-            lines = []
-            for i, line in enumerate(f):
-                if i >= max_lines:
-                    break
-                lines.append(line.strip())
-            return lines
+        # 一次读取文件开头，编码检测与内容解码共用同一块缓冲区
+        with open(file_path, 'rb', buffering=read_size) as f:
+            raw_data = f.read(read_size)
+    except Exception as e:
+        print(f"读取文件 {file_path} 失败: {e}")
+        return []
+    
+    try:
+        encoding = _detect_encoding_from_bytes(raw_data[:10000])
+    except Exception:
+        encoding = 'utf-8'
+    
+    try:
+        text = raw_data.decode(encoding, errors='ignore')
+        return [line.strip() for line in text.splitlines()[:max_lines]]
     except Exception as e:
         print(f"读取文件 {file_path} 失败: {e}")
         return []
 
 def extract_book_title(lines):
     """从文件内容中提取书名"""
-    # 常见的书名模式
-    patterns = [
-        r'《(.+?)》',  # 《书名》
-        r'书名[:：]\s*(.+)',  # 书名: 书名
-        r'篇名[:：]\s*(.+)',  # 篇名: 书名
-        r'作品[:：]\s*(.+)',  # 作品: 书名
-        r'小说[:：]\s*(.+)',  # 小说: 书名
-        r'标题[:：]\s*(.+)',  # 标题: 书名
-        r'题目[:：]\s*(.+)',  # 题目: 书名
-        r'^(.+?)\s*作者[:：]',  # 书名 作者:
-        r'^(.+?)\s*著',  # 书名 著
-        r'第一章\s*(.+)',  # 第一章 章节名（可能包含书名）
-    ]
-    
     # 检查前几行
     for line in lines[:20]:  # 只检查前20行
         if not line or len(line.strip()) < 2:
             continue
             
         # 移除常见的无关内容
-        line = re.sub(r'^第[一二三四五六七八九十\d]+[章节]', '', line)
-        line = re.sub(r'^\d+\.', '', line)
+        line = _CHAPTER_PREFIX_RE.sub('', line)
+        line = _NUMBER_PREFIX_RE.sub('', line)
         line = line.strip()
         
         if len(line) < 2:
             continue
             
-        # 尝试各种模式
-        for pattern in patterns:
-            match = re.search(pattern, line, re.IGNORECASE)
+        # 没有任何模式能匹配时直接跳过该行
+        if not _ANY_TITLE_RE.search(line):
+            continue
+        
+        # 按优先级依次尝试各种模式
+        for pattern in _TITLE_PATTERNS:
+            match = pattern.search(line)
             if match:
                 title = match.group(1).strip()
                 # 清理标题
@@ -87,32 +176,12 @@ def extract_book_title(lines):
 def clean_title(title):
     """清理书名"""
     # 移除常见的无关词汇
-    unwanted_patterns = [
-        r'第[一二三四五六七八九十\d]+[章节].*',
-        r'^\d+\..*',
-        r'正文.*',
-        r'序章.*',
-        r'楔子.*',
-        r'前言.*',
-        r'目录.*',
-        r'内容简介.*',
-        r'作者.*',
-        r'www\..*',
-        r'http.*',
-        r'来源.*',
-        r'转载.*',
-        r'整理.*',
-        r'校对.*',
-        r'txt.*',
-    ]
-    
-    for pattern in unwanted_patterns:
-        title = re.sub(pattern, '', title, flags=re.IGNORECASE)
+    title = _UNWANTED_RE.sub('', title)
     
     # 移除特殊字符
-    title = re.sub(r'[<>:"/\\|?*]', '', title)
+    title = _SPECIAL_CHARS_RE.sub('', title)
     # 移除多余空格
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = _WHITESPACE_RE.sub(' ', title).strip()
     
     return title
 
@@ -122,20 +191,8 @@ def is_valid_title(title):
         return False
     
     # 排除明显不是书名的内容
-    invalid_patterns = [
-        r'^\d+$',  # 纯数字
-        r'^第\d+章',  # 第X章
-        r'^chapter\s*\d+',  # chapter X
-        r'^www\.',  # 网址
-        r'^http',  # 网址
-        r'^\s*$',  # 空白
-        r'^[a-zA-Z]+$',  # 纯英文字母
-        r'^[\W]+$',  # 纯特殊字符
-    ]
-    
-    for pattern in invalid_patterns:
-        if re.match(pattern, title, re.IGNORECASE):
-            return False
+    if _INVALID_RE.match(title):
+        return False
     
     # 书名长度限制
     if len(title) > 50:
@@ -154,29 +211,50 @@ def is_numeric_filename(filename):
         return True
     return False
 
+def _rename_no_replace(src, dst):
+    """重命名文件，目标已存在时抛出FileExistsError而不是覆盖"""
+    if os.name == 'nt':
+        # Windows 下 os.rename 本身不会覆盖已存在的文件
+        os.rename(src, dst)
+        return
+    try:
+        # POSIX 下 rename 会静默覆盖，借助硬链接实现原子的“不存在才创建”
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError:
+        # 不支持硬链接的文件系统（如 exFAT），退回先检查再重命名
+        if os.path.lexists(dst):
+            raise FileExistsError(dst)
+        os.rename(src, dst)
+        return
+    os.unlink(src)
+
 def rename_file(old_path, new_title):
     """重命名文件"""
     old_path = Path(old_path)
     parent_dir = old_path.parent
     extension = old_path.suffix
     
-    # 构造新文件名
-    new_filename = f"《{new_title}》{extension}"
-    new_path = parent_dir / new_filename
-    
-    # 如果新文件名已存在，添加序号
-    counter = 1
-    while new_path.exists():
-        new_filename = f"《{new_title}》({counter}){extension}"
+    # 直接尝试重命名，目标已存在时添加序号重试
+    for counter in range(1000):
+        if counter == 0:
+            new_filename = f"《{new_title}》{extension}"
+        else:
+            new_filename = f"《{new_title}》({counter}){extension}"
         new_path = parent_dir / new_filename
-        counter += 1
+        
+        try:
+            _rename_no_replace(old_path, new_path)
+            return new_path
+        except FileExistsError:
+            continue
+        except Exception as e:
+            print(f"重命名失败: {old_path} -> {new_path}, 错误: {e}")
+            return None
     
-    try:
-        old_path.rename(new_path)
-        return new_path
-    except Exception as e:
-        print(f"重命名失败: {old_path} -> {new_path}, 错误: {e}")
-        return None
+    print(f"重命名失败: {old_path}, 同名文件过多")
+    return None
 
 def main():
     """主函数"""
@@ -198,20 +276,16 @@ def main():
         print(f"错误: 目录 '{base_dir}' 不存在或不是一个有效的目录")
         return
     
-    # 找出所有数字命名的txt文件
-    numeric_files = []
-    for file_path in base_dir.glob("*.txt"):
-        # 过滤掉._开头的macOS隐藏文件
-        if not file_path.name.startswith("._") and is_numeric_filename(file_path.name):
-            numeric_files.append(file_path)
-    
-    # 也查找TXT文件（大写扩展名）
-    for file_path in base_dir.glob("*.TXT"):
-        if not file_path.name.startswith("._") and is_numeric_filename(file_path.name):
-            numeric_files.append(file_path)
-    
-    # 更可靠的判断：根据文件名检查是否是数字命名
-    numeric_files = [f for f in numeric_files if is_numeric_filename(f.name)]
+    # 找出所有数字命名的txt文件（单次遍历目录，扩展名不区分大小写，
+    # 并过滤掉._开头的macOS隐藏文件）
+    with os.scandir(base_dir) as entries:
+        numeric_files = [
+            Path(entry.path) for entry in entries
+            if not entry.name.startswith("._")
+            and entry.name.lower().endswith(".txt")
+            and is_numeric_filename(entry.name)
+            and entry.is_file(follow_symlinks=False)
+        ]
     
     print(f"找到 {len(numeric_files)} 个数字命名的txt文件")
     if len(numeric_files) == 0:
@@ -25,68 +25,134 @@ TXT文件预览工具（集成编码修复功能）
 更新日期：2025年6月28日
 """
 
+import io
 import sys
 import os
+import re
+import codecs
 import argparse
-import random
 from pathlib import Path
 
-def get_file_content(file_path, max_chars=None):
+# 以脚本方式运行时项目根目录不在模块搜索路径中
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+from core.encoding_utils import bom_encoding
+
+# 候选编码，优先尝试中文编码
+ENCODINGS = [
+    'utf-8', 'gbk', 'gb2312', 'utf-16', 'big5',
+    'iso-8859-1', 'cp1252', 'latin-1', 'ascii',
+    'utf-16le', 'utf-16be', 'utf-32'
+]
+
+# 无需中文字符校验即可直接采用的编码
+TRUSTED_ENCODINGS = ('utf-8', 'gbk', 'gb2312')
+
+# 中日韩统一表意文字基本区
+_CJK_RE = re.compile('[\u4e00-\u9fff]')
+
+def _count_chinese_chars(text, limit=100):
+    """统计文本前limit个字符中的中文字符数"""
+    return len(_CJK_RE.findall(text, 0, limit))
+
+# 开头为纯ASCII时继续向后查找非ASCII字节的最大读取量
+_SNIFF_LIMIT = 1024 * 1024
+_NON_ASCII_RE = re.compile(rb'[\x80-\xff]')
+
+def _read_sniff_sample(f, size=2048):
     """
-    使用多种编码尝试读取整个或部分文件内容。
+    读取用于判断编码的字节样本。
     
+    纯ASCII内容能被任何候选编码解码，无法区分编码；开头为纯ASCII时继续向后读取，
+    从第一个非ASCII字节处取样。
+
     Args:
-        file_path (str): 文件路径。
-        max_chars (int, optional): 最大读取字符数。如果为None，则读取整个文件。
+        f: 以二进制模式打开的文件对象。
+        size (int): 样本大小（字节）。
 
     Returns:
-        tuple: (文件内容, 使用的编码) 或 (None, None) 如果失败。
+        bytes: 字节样本。
+    """
+    head = f.read(size)
+    chunk = head
+    total = len(chunk)
+    while chunk and chunk.isascii() and total < _SNIFF_LIMIT:
+        chunk = f.read(64 * 1024)
+        total += len(chunk)
+    if chunk is head or not chunk or chunk.isascii():
+        return head
+    # 前面的内容都是ASCII，第一个非ASCII字节必定是一个字符的起始字节
+    sample = chunk[_NON_ASCII_RE.search(chunk).start():]
+    if len(sample) < size:
+        sample += f.read(size - len(sample))
+    return sample[:size]
+
+def _sniff_encoding(head_bytes):
+    """
+    根据文件开头的字节样本判断编码。
+    
+    Args:
+        head_bytes (bytes): 文件开头的字节样本。
+
+    Returns:
+        str: 判断出的编码，无法判断时返回None。
     """
-    # 优先尝试中文编码
-    encodings = [
-        'utf-8', 'gbk', 'gb2312', 'utf-16', 'big5',
-        'iso-8859-1', 'cp1252', 'latin-1', 'ascii',
-        'utf-16le', 'utf-16be', 'utf-32'
-    ]
+    encoding = bom_encoding(head_bytes)
+    if encoding:
+        return encoding
     
-    # 第一轮：直接文本模式读取
-    for encoding in encodings:
+    for encoding in ENCODINGS:
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read(max_chars) if max_chars else f.read()
-                # 检查是否包含中文字符，如果是乱码会很少有中文
-                chinese_char_count = sum(1 for char in content[:100] if '\u4e00' <= char <= '\u9fff')
-                if chinese_char_count > 5 or encoding in ['utf-8', 'gbk', 'gb2312']:
-                    print(f"✓ 成功使用编码: {encoding} (中文字符: {chinese_char_count}/100)")
-                    return content, encoding
-                else:
-                    print(f"⚠ 尝试编码 {encoding} - 疑似乱码，继续尝试其他编码")
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-        except Exception:
+            # 样本末尾可能截断多字节字符，使用增量解码器容忍不完整的结尾
+            text = codecs.getincrementaldecoder(encoding)().decode(head_bytes, final=False)
+        except (UnicodeDecodeError, UnicodeError, LookupError):
             continue
+        # 检查是否包含中文字符，如果是乱码会很少有中文
+        if encoding in TRUSTED_ENCODINGS or _count_chinese_chars(text) > 5:
+            return encoding
+    return None
+
+def get_file_content(file_path, max_chars=None):
+    """
+    先根据文件开头判断编码，再读取整个或部分文件内容。
     
-    # 第二轮：二进制模式读取后解码
+    Args:
+        file_path (str): 文件路径。
+        max_chars (int, optional): 最大读取字符数。如果为None，则读取整个文件。
+
+    Returns:
+        tuple: (文件内容, 使用的编码) 或 (None, None) 如果失败。
+    """
+    # 第一步：读取2KB样本判断编码，只打开一次文件读取正文
     try:
         with open(file_path, 'rb') as f:
-            raw_content = f.read(max_chars * 4 if max_chars else -1)  # 中文字符可能占用2-4字节
-            for encoding in encodings:
-                try:
-                    content = raw_content.decode(encoding, errors='ignore')
-                    if content.strip():  # 确保解码后有有效内容
-                        chinese_char_count = sum(1 for char in content[:100] if '\u4e00' <= char <= '\u9fff')
-                        if chinese_char_count > 5:
-                            print(f"✓ 成功使用编码 (二进制模式): {encoding} (中文字符: {chinese_char_count}/100)")
-                            return content[:max_chars] if max_chars else content, encoding
-                except (UnicodeDecodeError, UnicodeError):
-                    continue
-                except Exception:
-                    continue
+            head_bytes = _read_sniff_sample(f)
     except Exception:
-        pass
+        return None, None
+    
+    encoding = _sniff_encoding(head_bytes)
+    if encoding:
+        # 判断出的编码无法完整解码时，依次严格尝试其他中文编码
+        candidates = [encoding] + [enc for enc in TRUSTED_ENCODINGS if enc != encoding]
+        for candidate in candidates:
+            try:
+                with open(file_path, 'r', encoding=candidate) as f:
+                    content = f.read(max_chars) if max_chars else f.read()
+                chinese_char_count = _count_chinese_chars(content)
+                print(f"✓ 成功使用编码: {candidate} (中文字符: {chinese_char_count}/100)")
+                return content, candidate
+            except (UnicodeDecodeError, UnicodeError):
+                print(f"⚠ 编码 {candidate} 无法完整解码文件")
+            except Exception:
+                pass
+        print("⚠ 候选编码均无法完整解码文件，改用容错模式")
     
     # 最后尝试：使用错误处理策略强制读取
-    for encoding in ['gbk', 'gb2312', 'utf-8', 'iso-8859-1']:
+    for encoding in [encoding, 'gbk', 'gb2312', 'utf-8', 'iso-8859-1']:
+        if not encoding:
+            continue
         try:
             with open(file_path, 'r', encoding=encoding, errors='replace') as f:
                 content = f.read(max_chars) if max_chars else f.read()
@@ -97,6 +163,95 @@ def get_file_content(file_path, max_chars=None):
         
     return None, None
 
+# 需要在片段起点重新同步字符边界的多字节编码
+_MULTIBYTE_CODECS = {'gbk', 'gb2312', 'gb18030', 'big5', 'big5hkscs', 'cp950'}
+
+def _fragment_codec(encoding, head_bytes):
+    """
+    确定从文件中间位置解码片段时使用的编码。
+
+    Args:
+        encoding (str): 读取文件开头时使用的编码。
+        head_bytes (bytes): 文件开头的字节（用于判断BOM字节序）。
+
+    Returns:
+        tuple: (解码使用的编码, 字符对齐宽度)
+    """
+    name = codecs.lookup(encoding).name
+    if name.startswith('utf-8'):
+        return 'utf-8', 1
+    for family, width, bom_be in (('utf-16', 2, codecs.BOM_UTF16_BE), ('utf-32', 4, codecs.BOM_UTF32_BE)):
+        if name.startswith(family):
+            if name.endswith(('-be', '-le')):
+                return name, width
+            # 无字节序后缀时根据BOM判断，默认小端
+            return (f'{family}-be' if head_bytes.startswith(bom_be) else f'{family}-le'), width
+    return name, 1
+
+def _read_fragment(f, offset, fragment_size, codec, width, strict=False):
+    """
+    从指定字节偏移读取一个片段，跳过开头不完整的字符。
+
+    Args:
+        f: 以二进制模式打开的文件对象。
+        offset (int): 起始字节偏移。
+        fragment_size (int): 片段大小（字符数）。
+        codec (str): 解码使用的编码。
+        width (int): 字符对齐宽度。
+        strict (bool): 是否严格解码，为True时无法解码会抛出UnicodeDecodeError。
+
+    Returns:
+        str: 解码后的片段文本。
+    """
+    offset -= offset % width
+    f.seek(offset)
+    raw = f.read(fragment_size * 4 + 512)
+    
+    if codec == 'utf-8':
+        # 跳过UTF-8续字节（0x80-0xBF），从完整字符开始
+        start = 0
+        while start < len(raw) and 0x80 <= raw[start] <= 0xBF:
+            start += 1
+        raw = raw[start:]
+    elif codec in _MULTIBYTE_CODECS:
+        # 双字节编码无法自同步，从下一个换行处开始以保证字节对齐
+        newline = raw.find(b'\n')
+        if newline != -1:
+            raw = raw[newline + 1:]
+    
+    if strict:
+        # 片段末尾可能截断多字节字符，使用增量解码器容忍不完整的结尾
+        text = codecs.getincrementaldecoder(codec)().decode(raw, final=False)
+    else:
+        text = raw.decode(codec, errors='ignore')
+    # 与文本模式读取保持一致，统一换行符
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text[:fragment_size]
+
+def _recheck_fragment_codec(f, offset, fragment_bytes, codec, width):
+    """
+    根据片段内容重新判断编码（文件开头的样本可能不足以判断全文编码）。
+
+    Args:
+        f: 以二进制模式打开的文件对象。
+        offset (int): 片段起始字节偏移。
+        fragment_bytes (int): 读取的字节数。
+        codec (str): 当前使用的编码。
+        width (int): 当前的字符对齐宽度。
+
+    Returns:
+        tuple: (解码使用的编码, 字符对齐宽度)，无法判断时沿用当前编码。
+    """
+    f.seek(offset - offset % width)
+    raw = f.read(fragment_bytes)
+    # 换行符处必定是字符边界（UTF-8和GBK均如此），从这里开始判断
+    raw = raw[raw.find(b'\n') + 1:]
+    encoding = _sniff_encoding(raw)
+    if not encoding:
+        return codec, width
+    print(f"⚠ 编码 {codec} 无法解码文件片段，改用: {encoding}")
+    return _fragment_codec(encoding, b'')
+
 def preview_txt_file(file_path, begin_chars=3000, fragment_count=0, fragment_size=300):
     """
     预览txt文件的开头，并可选择性地提取随机片段。
@@ -110,9 +265,11 @@ def preview_txt_file(file_path, begin_chars=3000, fragment_count=0, fragment_siz
     Returns:
         str: 包含开头和随机片段的预览文本。
     """
-    output = []
+    output = io.StringIO()
     
-    full_content, encoding = get_file_content(file_path)
+    # 只读取开头部分（至少100字符用于中文字符校验），随机片段按需定位读取
+    head_chars = max(begin_chars, 100)
+    full_content, encoding = get_file_content(file_path, max_chars=head_chars)
     
     if not full_content:
         # 如果读取失败，尝试调用旧的修复逻辑（如果存在）
@@ -128,9 +285,9 @@ def preview_txt_file(file_path, begin_chars=3000, fragment_count=0, fragment_siz
                 print(f"✓ 编码修复成功: {result['message']}")
                 print(f"  备份文件: {result['backup_file']}")
                 # 重新尝试读取修复后的文件
-                full_content, encoding = get_file_content(file_path)
+                full_content, encoding = get_file_content(file_path, max_chars=head_chars)
                 if full_content:
-                    chinese_char_count = sum(1 for char in full_content[:100] if '\u4e00' <= char <= '\u9fff')
+                    chinese_char_count = _count_chinese_chars(full_content)
                     print(f"✓ 修复后重新读取成功 (中文字符: {chinese_char_count}/100)")
             else:
                 print(f"⚠ 编码修复结果: {result['message']}")
@@ -148,31 +305,47 @@ def preview_txt_file(file_path, begin_chars=3000, fragment_count=0, fragment_siz
 
     # 1. 提取开头部分
     if begin_chars > 0:
-        output.append("=== [文件开头片段] ===")
-        output.append(full_content[:begin_chars].strip())
-        output.append("===")
-        output.append("")
+        print("=== [文件开头片段] ===", file=output)
+        print(full_content[:begin_chars].strip(), file=output)
+        print("===", file=output)
+        print(file=output)
 
-    # 2. 提取随机片段
+    # 2. 提取随机片段（按字节偏移定位，避免将整个文件读入内存）
     if fragment_count > 0:
-        content_len = len(full_content)
-        # 确保我们不在开头部分重复取样
-        start_offset = begin_chars if content_len > begin_chars else 0
-        
-        if content_len > start_offset + fragment_size:
-            output.append("=== [文件随机片段] ===")
-            
-            for i in range(fragment_count):
-                # 随机选择一个起始点
-                random_start = random.randint(start_offset, max(start_offset, content_len - fragment_size - 1))
-                fragment = full_content[random_start : random_start + fragment_size]
+        import random
+        try:
+            file_size = os.path.getsize(file_path)
+            with open(file_path, 'rb') as f:
+                codec, width = _fragment_codec(encoding, f.read(4))
+                # 确保我们不在开头部分重复取样
+                head_size = len(full_content[:begin_chars].encode(codec, errors='ignore'))
+                fragment_bytes = fragment_size * 4
+                start_offset = head_size if file_size > head_size else 0
                 
-                output.append(f"--- 片段 {i+1} (从字符 {random_start} 开始) ---")
-                output.append(fragment.strip())
-            
-            output.append("===")
+                if file_size > start_offset + fragment_bytes:
+                    print("=== [文件随机片段] ===", file=output)
+                    # 开头判断的编码在第一次无法严格解码片段时重新确认一次
+                    rechecked = False
+                    
+                    for i in range(fragment_count):
+                        # 随机选择一个起始点
+                        random_start = random.randint(start_offset, max(start_offset, file_size - fragment_bytes - 1))
+                        try:
+                            fragment = _read_fragment(f, random_start, fragment_size, codec, width, strict=not rechecked)
+                        except UnicodeDecodeError:
+                            rechecked = True
+                            codec, width = _recheck_fragment_codec(f, random_start, fragment_bytes, codec, width)
+                            fragment = _read_fragment(f, random_start, fragment_size, codec, width)
+                        
+                        print(f"--- 片段 {i+1} (从字节 {random_start} 开始) ---", file=output)
+                        print(fragment.strip(), file=output)
+                    
+                    print("===", file=output)
+        except Exception as e:
+            print(f"⚠ 提取随机片段失败: {e}")
 
-    return "\n".join(output)
+    # 逐行写入时每行末尾都带换行，去掉最后一个以保持原有输出格式
+    return output.getvalue()[:-1]
 
 def main():
     """主函数，处理命令行参数"""
@@ -216,7 +389,7 @@ def main():
         fragment_size = 0
         print("提示：检测到旧版调用方式，已兼容。建议使用新的命令行参数格式。")
         preview_content = preview_txt_file(file_path, begin_chars, fragment_count, fragment_size)
-        print(preview_content)
+        sys.stdout.write(preview_content + "\n")
         return
 
     args = parser.parse_args()
@@ -231,7 +404,8 @@ def main():
         args.fragment,
         args.fragment_size
     )
-    print(preview_content)
+    # 一次性写出，减少控制台写入次数
+    sys.stdout.write(preview_content + "\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
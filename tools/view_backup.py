@@ -7,48 +7,101 @@
 因为备份文件保持原始编码，需要用对应的编码方式打开
 """
 
-import chardet
-from pathlib import Path
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-def detect_and_read_file(file_path):
-    """检测并读取文件"""
+# 以脚本方式运行时项目根目录不在模块搜索路径中
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
+
+from core.encoding_utils import sniff_encoding
+
+def read_backup_file(file_path):
+    """
+    检测编码并读取文件（不输出信息，可在线程池中并发调用）
+    
+    Returns:
+        dict: 包含 content、encoding、detected_encoding、confidence、messages
+    """
+    info = {
+        "content": "",
+        "encoding": None,
+        "detected_encoding": None,
+        "confidence": 0,
+        "messages": []
+    }
+    
     try:
         # 检测编码
         with open(file_path, 'rb') as f:
             raw_data = f.read()
         
-        encoding_result = chardet.detect(raw_data)
-        encoding = encoding_result.get('encoding', 'utf-8')
-        confidence = encoding_result.get('confidence', 0)
+        encoding = sniff_encoding(raw_data)
+        if encoding:
+            confidence = 1.0
+        else:
+            # 快速判断失败时才使用chardet（延迟导入，多数文件无需加载）
+            import chardet
+            encoding_result = chardet.detect(raw_data)
+            encoding = encoding_result.get('encoding', 'utf-8')
+            confidence = encoding_result.get('confidence', 0)
         
-        print(f"文件: {file_path.name}")
-        print(f"检测编码: {encoding} (置信度: {confidence:.2f})")
+        info["detected_encoding"] = encoding
+        info["confidence"] = confidence
         
         # 尝试读取内容
         try:
             with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
-            return content, encoding
+                info["content"] = f.read()
+            info["encoding"] = encoding
+            return info
         except UnicodeDecodeError:
             # 如果失败，尝试其他常见编码
             for fallback_encoding in ['gbk', 'gb2312', 'utf-8', 'latin1']:
                 try:
                     with open(file_path, 'r', encoding=fallback_encoding) as f:
-                        content = f.read()
-                    print(f"实际使用编码: {fallback_encoding}")
-                    return content, fallback_encoding
+                        info["content"] = f.read()
+                    info["encoding"] = fallback_encoding
+                    info["messages"].append(f"实际使用编码: {fallback_encoding}")
+                    return info
                 except UnicodeDecodeError:
                     continue
             
             # 如果都失败了，用errors='ignore'读取
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            print("警告: 使用UTF-8忽略错误方式读取")
-            return content, 'utf-8-ignore'
+                info["content"] = f.read()
+            info["encoding"] = 'utf-8-ignore'
+            info["messages"].append("警告: 使用UTF-8忽略错误方式读取")
+            return info
             
     except Exception as e:
-        return f"读取文件失败: {e}", None
+        info["content"] = f"读取文件失败: {e}"
+        return info
+
+def _print_detection(file_path, info):
+    """输出编码检测信息"""
+    if info["detected_encoding"] is None:
+        return
+    print(f"文件: {file_path.name}")
+    print(f"检测编码: {info['detected_encoding']} (置信度: {info['confidence']:.2f})")
+    for message in info["messages"]:
+        print(message)
+
+def detect_and_read_file(file_path):
+    """检测并读取文件"""
+    info = read_backup_file(file_path)
+    _print_detection(file_path, info)
+    return info["content"], info["encoding"]
+
+def _read_backup_preview(file_path, preview_chars=200):
+    """读取文件并只保留预览部分，避免并发读取时占用过多内存"""
+    info = read_backup_file(file_path)
+    info["length"] = len(info["content"])
+    info["content"] = info["content"][:preview_chars]
+    return info
 
 def view_backup_file(backup_file_path):
     """查看单个备份文件"""
@@ -84,21 +137,25 @@ def view_backup_directory(backup_dir_path):
     
     print(f"找到 {len(txt_files)} 个备份文件:")
     
-    for i, file_path in enumerate(txt_files, 1):
-        print(f"\n{'='*60}")
-        print(f"[{i}/{len(txt_files)}] {file_path.name}")
-        print(f"{'='*60}")
-        
-        content, encoding = detect_and_read_file(file_path)
+    # 并发读取与检测编码，按原顺序输出结果
+    with ThreadPoolExecutor(max_workers=min(16, len(txt_files))) as executor:
+        previews = executor.map(_read_backup_preview, txt_files)
         
-        # 显示内容预览
-        print("内容预览（前200字符）:")
-        print("-" * 40)
-        print(content[:200])
-        if len(content) > 200:
-            print("...")
-        print("-" * 40)
-        print()
+        for i, (file_path, info) in enumerate(zip(txt_files, previews), 1):
+            print(f"\n{'='*60}")
+            print(f"[{i}/{len(txt_files)}] {file_path.name}")
+            print(f"{'='*60}")
+            
+            _print_detection(file_path, info)
+            
+            # 显示内容预览
+            print("内容预览（前200字符）:")
+            print("-" * 40)
+            print(info["content"])
+            if info["length"] > 200:
+                print("...")
+            print("-" * 40)
+            print()
 
 def main():
     """主函数"""
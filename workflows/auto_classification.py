@@ -13,18 +13,57 @@
 """
 
 import os
+import re
+import errno
+import codecs
 import sys
+import json
+import pickle
 import shutil
-import yaml
+import hashlib
+import threading
 from pathlib import Path
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Optional, Callable
 from core.logger_manager import get_logger
+from core.json_utils import write_json_atomic
+from core.encoding_utils import sniff_encoding
+
+try:
+    import ahocorasick
+except ImportError:  # 可选依赖，未安装时退回逐关键词计数
+    ahocorasick = None
+
+# 关键词分组及其在权重配置中的键名
+_WEIGHT_GROUPS = (('high_weight', 'high', 3), ('medium_weight', 'medium', 2), ('low_weight', 'low', 1))
+
+# txt_preview输出中的片段标记（=== [文件开头片段] === 与 --- 片段 X --- 合并为一次替换）
+_FRAG_RE = re.compile(r'=== \[.*?\] ===|--- 片段 \d+ .*? ---')
+
+def _detect_head_encoding(head: bytes) -> Optional[str]:
+    """
+    根据文件开头的字节样本（约2KB）检测编码
+    
+    Returns:
+        Optional[str]: 编码名称，无法判断时返回None
+    """
+    encoding = sniff_encoding(head)
+    if encoding:
+        return encoding
+    
+    # 快速判断失败时才使用chardet（延迟导入）
+    import chardet
+    return chardet.detect(head).get('encoding')
 
 class AutoClassificationWorkflow:
     """自动分类工作流"""
     
+    # 已编译的分类配置，在实例间共享:
+    # {缓存键: (categories, thresholds, weights, automaton, scoring_plan, normalize_whitespace)}
+    _AUTOMATON_CACHE: Dict[tuple, tuple] = {}
+    
     def __init__(self, library_path: str, config_manager=None, progress_callback: Optional[Callable] = None):
         """
         初始化分类工作流
@@ -44,6 +83,9 @@ class AutoClassificationWorkflow:
         # 加载配置
         self._load_classification_config()
         
+        # 导入txt_preview预览函数（只导入一次，不可用时使用简单预览）
+        self._preview_txt_file = self._import_preview_tool()
+        
         # 统计信息
         self.stats = {
             'total_files': 0,
@@ -55,6 +97,13 @@ class AutoClassificationWorkflow:
         }
         self.processing_log = []
         
+        # 统计信息缓存，按目录/文件修改时间判断是否失效
+        self._stats_cache: Dict[Path, tuple] = {}
+        self._report_cache: Dict[tuple, Optional[Dict]] = {}
+        
+        # 已确认存在的分类目录，避免每次移动文件都调用mkdir
+        self._known_dirs = set()
+        
         # 创建二次确认目录
         self.secondary_check_dir.mkdir(exist_ok=True)
     
@@ -67,21 +116,39 @@ class AutoClassificationWorkflow:
         """加载分类配置"""
         try:
             if self.config_manager:
-                # 从配置管理器获取配置
+                # 从配置管理器获取配置，以配置内容作为缓存键
                 config = self.config_manager.get_classification_config()
+                cache_key = ('config_manager', json.dumps(config, sort_keys=True, ensure_ascii=False, default=str))
+                automaton_path = Path(self.config_manager.keywords_config_path).with_suffix('.aho.pkl')
             else:
-                # 直接从文件加载
+                # 直接从文件加载，以文件修改时间作为缓存键
                 config_path = self.library_path.parent / "config" / "keywords_config.yaml"
                 if config_path.exists():
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        config = yaml.safe_load(f)
+                    config = None
+                    cache_key = (str(config_path), config_path.stat().st_mtime_ns)
+                    automaton_path = config_path.with_suffix('.aho.pkl')
                 else:
                     config = self._get_default_config()
+                    cache_key = ('default',)
+                    automaton_path = None
+            
+            # 配置指纹，配置变化后旧的自动机文件不再命中
+            self._config_fingerprint = hashlib.blake2b(repr(cache_key).encode('utf-8'), digest_size=8).hexdigest()
+            
+            compiled = self._AUTOMATON_CACHE.get(cache_key)
+            if compiled is None:
+                if config is None:
+                    import yaml  # 只有直接读取配置文件时才需要
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        config = yaml.safe_load(f)
+                compiled = self._compile_config(config, automaton_path)
+                self._AUTOMATON_CACHE[cache_key] = compiled
             
             # 提取配置项
-            self.categories = config.get('categories', {})
-            self.thresholds = config.get('thresholds', {})
-            self.weights = config.get('weights', {})
+            (self.categories, self.thresholds, self.weights,
+             self._automaton, self._scoring_plan, self._normalize_whitespace) = compiled
+            # 分类名按序号排列，评分时以序号索引
+            self._category_names = tuple(self.categories)
             
             # 设置默认阈值
             self.SCORE_THRESHOLD = self.thresholds.get('direct_classification', 16)
@@ -91,6 +158,20 @@ class AutoClassificationWorkflow:
             self.logger.error(f"加载分类配置失败: {e}")
             self._load_default_config()
     
+    def _compile_config(self, config: Dict, automaton_path: Optional[Path] = None) -> tuple:
+        """提取配置项并构建关键词自动机"""
+        categories = config.get('categories', {})
+        thresholds = config.get('thresholds', {})
+        weights = config.get('weights', {})
+        automaton = self._load_saved_automaton(automaton_path)
+        if automaton is None:
+            automaton = self._build_automaton(categories, weights)
+            self._save_automaton(automaton_path, automaton)
+        # 有自动机时不再需要逐关键词计数的评分计划
+        scoring_plan = None if automaton is not None else self._build_scoring_plan(categories, weights)
+        return (categories, thresholds, weights, automaton, scoring_plan,
+                self._needs_whitespace_normalization(categories))
+    
     def _load_default_config(self):
         """加载默认配置"""
         config = self._get_default_config()
@@ -99,6 +180,104 @@ class AutoClassificationWorkflow:
         self.weights = config['weights']
         self.SCORE_THRESHOLD = 16
         self.SCORE_DIFFERENCE_THRESHOLD = 4
+        self._config_fingerprint = 'default'
+        self._automaton = self._build_automaton(self.categories, self.weights)
+        self._scoring_plan = self._build_scoring_plan(self.categories, self.weights)
+        self._normalize_whitespace = self._needs_whitespace_normalization(self.categories)
+        self._category_names = tuple(self.categories)
+    
+    def _needs_whitespace_normalization(self, categories: Dict) -> bool:
+        """只有关键词本身含空白字符时，压缩空白才会影响匹配结果"""
+        return any(
+            any(ch.isspace() for ch in keyword)
+            for keyword_groups in categories.values()
+            for group, _, _ in _WEIGHT_GROUPS
+            for keyword in keyword_groups.get(group) or ()
+        )
+    
+    def _collect_keyword_entries(self, categories: Dict, weights: Dict) -> Dict[str, tuple]:
+        """
+        汇总所有关键词，同一关键词在多个分类或权重组中出现时只保留一个词条
+        
+        Returns:
+            Dict[str, tuple]: {小写关键词: ((分类序号, 该分类下的权重之和), ...)}
+        """
+        keyword_weights = {}
+        for category_id, keyword_groups in enumerate(categories.values()):
+            for group, weight_key, default_weight in _WEIGHT_GROUPS:
+                weight = weights.get(weight_key, default_weight)
+                for keyword in keyword_groups.get(group) or ():
+                    keyword = keyword.lower()
+                    if keyword:
+                        # 同一分类内重复的关键词权重相加，与逐个计数的得分一致
+                        category_weights = keyword_weights.setdefault(keyword, {})
+                        category_weights[category_id] = category_weights.get(category_id, 0) + weight
+        return {
+            keyword: tuple(category_weights.items())
+            for keyword, category_weights in keyword_weights.items()
+        }
+    
+    def _build_scoring_plan(self, categories: Dict, weights: Dict) -> tuple:
+        """
+        构建逐关键词计数使用的评分计划，每个不重复的关键词只计数一次
+        
+        Returns:
+            tuple: ((小写关键词, ((分类序号, 权重), ...)), ...)
+        """
+        return tuple(self._collect_keyword_entries(categories, weights).items())
+    
+    def _load_saved_automaton(self, automaton_path: Optional[Path]):
+        """加载上次保存的自动机，文件不存在或配置已变化时返回None"""
+        if ahocorasick is None or automaton_path is None or not automaton_path.exists():
+            return None
+        try:
+            # 文件与关键词配置位于同一配置目录，由本程序写入
+            with open(automaton_path, 'rb') as f:
+                fingerprint, automaton = pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"加载关键词自动机失败: {e}")
+            return None
+        return automaton if fingerprint == self._config_fingerprint else None
+    
+    def _save_automaton(self, automaton_path: Optional[Path], automaton):
+        """保存构建好的自动机，下次启动时直接加载"""
+        if automaton is None or automaton_path is None:
+            return
+        temp_path = automaton_path.with_name(f"{automaton_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'wb') as f:
+                pickle.dump((self._config_fingerprint, automaton), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, automaton_path)
+        except Exception as e:
+            self.logger.warning(f"保存关键词自动机失败: {e}")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+    
+    def _build_automaton(self, categories: Dict, weights: Dict):
+        """
+        将所有分类关键词构建为Aho-Corasick自动机，一次扫描即可统计全部关键词
+        
+        Returns:
+            自动机对象，未安装pyahocorasick或没有关键词时返回None
+        """
+        if ahocorasick is None:
+            return None
+        
+        # 分类以其在配置中的序号表示，扫描时直接累加到得分列表
+        keyword_entries = self._collect_keyword_entries(categories, weights)
+        
+        if not keyword_entries:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, entries in keyword_entries.items():
+            # 自身前后缀重叠的关键词（如“哈哈”）需要去除重叠匹配，与str.count的计数保持一致
+            overlapping = any(keyword[:i] == keyword[-i:] for i in range(1, len(keyword)))
+            automaton.add_word(keyword, (keyword, overlapping, entries))
+        automaton.make_automaton()
+        return automaton
     
     def _get_default_config(self):
         """获取默认分类配置"""
@@ -138,12 +317,14 @@ class AutoClassificationWorkflow:
             if not self.pending_dir.exists():
                 return []
             
-            # 扫描所有可能的txt文件（包括大小写变体）
-            txt_files = []
-            txt_extensions = ['.txt', '.TXT', '.Txt', '.tXt', '.txT', '.TxT', '.TXt', '.tXT']
-            
-            for ext in txt_extensions:
-                txt_files.extend(list(self.pending_dir.glob(f"*{ext}")))
+            # 单次遍历目录，扫描所有txt文件（扩展名不区分大小写，跳过隐藏文件）
+            with os.scandir(self.pending_dir) as entries:
+                txt_files = [
+                    Path(entry.path) for entry in entries
+                    if not entry.name.startswith('.')
+                    and entry.name.lower().endswith('.txt')
+                    and entry.is_file()
+                ]
             
             # 规范化文件名
             normalized_files = []
@@ -170,6 +351,18 @@ class AutoClassificationWorkflow:
             self.logger.error(f"扫描文件失败: {e}")
             return []
     
+    def _import_preview_tool(self) -> Optional[Callable]:
+        """导入txt_preview模块的预览函数，失败时返回None"""
+        try:
+            tools_path = str(self.library_path.parent / "tools")
+            if tools_path not in sys.path:
+                sys.path.append(tools_path)
+            from txt_preview import preview_txt_file
+            return preview_txt_file
+        except Exception as e:
+            self.logger.warning(f"导入txt_preview失败，将使用简单预览: {e}")
+            return None
+    
     def preview_and_fix_file(self, file_path: Path) -> tuple:
         """
         预览文件内容并自动修复编码问题
@@ -179,62 +372,72 @@ class AutoClassificationWorkflow:
             file_path: 文件路径
             
         Returns:
-            tuple: (内容字符串, 是否修复了编码)
+            tuple: (内容字符串, 是否修复了编码, 内容是否带有txt_preview的片段标记)
         """
-        try:
-            # 从配置获取文本提取参数
-            text_config = {}
-            if self.config_manager:
-                processing_config = self.config_manager.get_config().get('processing', {})
-                text_config = processing_config.get('text_extraction', {})
-            
-            # 设置默认值
-            begin_chars = text_config.get('begin_chars', 3000)
-            fragment_count = text_config.get('random_fragment_count', 3)
-            fragment_size = text_config.get('random_fragment_size', 500)
-            
-            # 导入txt_preview模块
-            tools_path = str(self.library_path.parent / "tools")
-            if tools_path not in sys.path:
-                sys.path.append(tools_path)
-            from txt_preview import preview_txt_file
-            
-            # 使用txt_preview提取内容
-            content = preview_txt_file(
-                str(file_path), 
-                begin_chars=begin_chars,
-                fragment_count=fragment_count,
-                fragment_size=fragment_size
-            )
-            
-            # 检查是否包含编码修复的消息
-            encoding_fixed = "编码修复成功" in content
-            
-            return content, encoding_fixed
-            
-        except Exception as e:
-            self.logger.error(f"预览文件失败: {e}")
-            # 降级到简单方法
+        if self._preview_txt_file is not None:
             try:
-                encodings = ['utf-8', 'gbk', 'gb2312', 'big5']
-                for encoding in encodings:
-                    try:
-                        with open(file_path, 'r', encoding=encoding) as f:
-                            content = f.read(3000)
-                        return content, False
-                    except UnicodeDecodeError:
-                        continue
-                return "文件读取失败", False
-            except Exception as fallback_e:
-                return f"预览失败: {fallback_e}", False
+                # 从配置获取文本提取参数
+                text_config = {}
+                if self.config_manager:
+                    processing_config = self.config_manager.get_config().get('processing', {})
+                    text_config = processing_config.get('text_extraction', {})
+                
+                # 设置默认值
+                begin_chars = text_config.get('begin_chars', 3000)
+                fragment_count = text_config.get('random_fragment_count', 3)
+                fragment_size = text_config.get('random_fragment_size', 500)
+                
+                # 使用txt_preview提取内容
+                content = self._preview_txt_file(
+                    str(file_path), 
+                    begin_chars=begin_chars,
+                    fragment_count=fragment_count,
+                    fragment_size=fragment_size
+                )
+                
+                # 检查是否包含编码修复的消息
+                encoding_fixed = "编码修复成功" in content
+                
+                return content, encoding_fixed, True
+                
+            except Exception as e:
+                self.logger.error(f"预览文件失败: {e}")
+        
+        # 降级到简单方法
+        return self._read_preview_fallback(file_path)
     
-    def classify_content(self, content: str, filename: str) -> tuple:
+    def _read_preview_fallback(self, file_path: Path) -> tuple:
+        """不使用txt_preview时的简单预览，只读取文件开头（内容不含片段标记）"""
+        try:
+            # 只读取一次文件开头，在内存中依次尝试各编码
+            # （3000个字符在这些编码下最多占12000字节）
+            with open(file_path, 'rb') as f:
+                raw_data = f.read(12000)
+            
+            # 先用检测出的编码解码，失败时再依次尝试常见编码
+            detected = _detect_head_encoding(raw_data[:2048])
+            encodings = ['utf-8', 'gbk', 'gb2312', 'big5']
+            if detected:
+                encodings = [detected] + [e for e in encodings if e != detected]
+            for encoding in encodings:
+                try:
+                    # 增量解码容忍末尾被截断的多字节字符
+                    content = codecs.getincrementaldecoder(encoding)().decode(raw_data, final=False)
+                    return content[:3000], False, False
+                except (UnicodeDecodeError, LookupError):
+                    continue
+            return "文件读取失败", False, False
+        except Exception as fallback_e:
+            return f"预览失败: {fallback_e}", False, False
+    
+    def classify_content(self, content: str, filename: str, has_fragment_markers: bool = True) -> tuple:
         """
         基于内容和文件名进行分类
         
         Args:
             content: 文件内容
             filename: 文件名
+            has_fragment_markers: 内容是否可能带有txt_preview的片段标记
             
         Returns:
             tuple: (分类目录名或'secondary_check', 得分信息)
@@ -244,53 +447,60 @@ class AutoClassificationWorkflow:
         text_to_analyze = f"{filename} {content}".lower()
         
         # 移除片段标记，只保留实际内容
-        import re
-        # 移除=== [文件开头片段] ===等标记
-        text_to_analyze = re.sub(r'=== \[.*?\] ===', '', text_to_analyze)
-        # 移除--- 片段 X ---等标记
-        text_to_analyze = re.sub(r'--- 片段 \d+ .*? ---', '', text_to_analyze)
-        # 移除多余的空白字符
-        text_to_analyze = ' '.join(text_to_analyze.split())
+        if has_fragment_markers:
+            text_to_analyze = _FRAG_RE.sub('', text_to_analyze)
+        # 移除多余的空白字符（关键词不含空白时压缩空白不改变匹配结果，可以跳过）
+        if self._normalize_whitespace:
+            text_to_analyze = ' '.join(text_to_analyze.split())
         
+        return self._score_text(text_to_analyze)
+    
+    def _score_text(self, text_to_analyze: str) -> tuple:
+        """对预处理后的文本计算各分类得分并给出分类结果"""
         # 统计每个类别的匹配度
-        category_scores = {}
-        for category, keyword_groups in self.categories.items():
-            score = 0
-            
-            # 处理高权重关键词
-            if 'high_weight' in keyword_groups:
-                for keyword in keyword_groups['high_weight']:
-                    score += text_to_analyze.count(keyword.lower()) * self.weights.get('high', 3)
-            
-            # 处理中权重关键词
-            if 'medium_weight' in keyword_groups:
-                for keyword in keyword_groups['medium_weight']:
-                    score += text_to_analyze.count(keyword.lower()) * self.weights.get('medium', 2)
-            
-            # 处理低权重关键词
-            if 'low_weight' in keyword_groups:
-                for keyword in keyword_groups['low_weight']:
-                    score += text_to_analyze.count(keyword.lower()) * self.weights.get('low', 1)
-            
-            category_scores[category] = score
-        
-        # 按得分排序
-        sorted_scores = sorted(category_scores.items(), key=lambda x: x[1], reverse=True)
+        if self._automaton is not None:
+            # 单次扫描统计所有关键词，按分类序号累加得分
+            scores = [0] * len(self._category_names)
+            last_match_end = {}
+            for end, (keyword, overlapping, entries) in self._automaton.iter(text_to_analyze):
+                if overlapping:
+                    if end - len(keyword) < last_match_end.get(keyword, -1):
+                        continue
+                    last_match_end[keyword] = end
+                for category_id, weight in entries:
+                    scores[category_id] += weight
+        else:
+            # 直接在str上计数：中文文本在str内部为定长双字节，比编码成UTF-8（三字节）后用bytes.count更快
+            scores = [0] * len(self._category_names)
+            for keyword, entries in self._scoring_plan:
+                count = text_to_analyze.count(keyword)
+                if count:
+                    for category_id, weight in entries:
+                        scores[category_id] += count * weight
         
-        if not sorted_scores or sorted_scores[0][1] == 0:
+        if not scores:
             return 'secondary_check', "无匹配关键词"
         
-        best_category, best_score = sorted_scores[0]
+        # 单次遍历找出最高分（同分时取配置中靠前的分类）
+        best_id = max(range(len(scores)), key=scores.__getitem__)
+        best_category = self._category_names[best_id]
+        best_score = scores[best_id]
+        
+        if best_score == 0:
+            return 'secondary_check', "无匹配关键词"
         
         # 检查得分是否达到阈值
         if best_score < self.SCORE_THRESHOLD:
             return 'secondary_check', f"得分过低 ({best_score}分)"
         
-        # 检查是否有其他分类得分接近
-        close_competitors = []
-        for category, score in sorted_scores[1:4]:
-            if score > 0 and (best_score - score) < self.SCORE_DIFFERENCE_THRESHOLD:
-                close_competitors.append(f"{category}({score})")
+        # 检查是否有其他分类得分接近（最多列出得分最高的3个）
+        close_ids = [
+            category_id for category_id, score in enumerate(scores)
+            if category_id != best_id and score > 0
+            and (best_score - score) < self.SCORE_DIFFERENCE_THRESHOLD
+        ]
+        close_ids.sort(key=scores.__getitem__, reverse=True)
+        close_competitors = [f"{self._category_names[i]}({scores[i]})" for i in close_ids[:3]]
         
         if close_competitors:
             competitors_str = ", ".join(close_competitors)
@@ -320,7 +530,9 @@ class AutoClassificationWorkflow:
                 target_file = target_dir / new_name
             else:
                 target_dir = self.library_path / target_category
-                target_dir.mkdir(exist_ok=True)
+                if target_dir not in self._known_dirs:
+                    target_dir.mkdir(exist_ok=True)
+                    self._known_dirs.add(target_dir)
                 target_file = target_dir / source_file.name
             
             # 如果目标文件已存在，生成新名称
@@ -337,8 +549,19 @@ class AutoClassificationWorkflow:
                     target_file = target_dir / f"{stem}_{counter}{suffix}"
                 counter += 1
             
-            # 移动文件
-            shutil.move(str(source_file), str(target_file))
+            # 移动文件：同一文件系统内直接重命名，跨设备时才复制后删除
+            try:
+                os.replace(source_file, target_file)
+            except FileNotFoundError:
+                if not source_file.exists():
+                    raise
+                # 目录在运行期间被删除，重新创建后再试一次
+                target_dir.mkdir(exist_ok=True)
+                os.replace(source_file, target_file)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                shutil.move(str(source_file), str(target_file))
             return True
             
         except Exception as e:
@@ -376,7 +599,7 @@ class AutoClassificationWorkflow:
             
             if not pending_files:
                 result["success"] = True  # 修改：没有待分类文件也视为成功
-                result["stats"] = self.stats.copy()  # 修改：返回空的统计数据
+                result["stats"] = dict.fromkeys(self.stats, 0)  # 修改：返回空的统计数据
                 result["message"] = "没有找到待分类文件"
                 self.logger.debug("没有找到待分类文件，返回空结果")
                 return result
@@ -387,29 +610,43 @@ class AutoClassificationWorkflow:
             
             self._update_progress(10, f"开始处理 {len(pending_files)} 个文件...")
             
-            # 逐个处理文件
-            for i, file_path in enumerate(pending_files):
-                try:
-                    file_result = self._process_single_file(file_path)
-                    self.processing_log.append(file_result)
-                    
-                    if file_result['success']:
-                        if file_result['is_secondary_check']:
-                            self.stats['secondary_check_files'] += 1
+            # 并发预览和分类文件，移动文件与统计在当前线程按完成顺序进行
+            total = len(pending_files)
+            max_workers = min(8, os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(self._classify_only, file_path): file_path
+                    for file_path in pending_files
+                }
+                
+                for i, future in enumerate(as_completed(futures), 1):
+                    file_path = futures[future]
+                    try:
+                        self.stats['total_files'] += 1
+                        try:
+                            file_result = self._apply_classification(future.result())
+                        except Exception as e:
+                            file_result = self._new_file_result(file_path)
+                            file_result['error'] = str(e)
+                        self.processing_log.append(file_result)
+                        
+                        if file_result['success']:
+                            if file_result['is_secondary_check']:
+                                self.stats['secondary_check_files'] += 1
+                            else:
+                                self.stats['classified_files'] += 1
+                            
+                            if file_result['encoding_fixed']:
+                                self.stats['encoding_fixed'] += 1
                         else:
-                            self.stats['classified_files'] += 1
+                            self.stats['error_files'] += 1
                         
-                        if file_result['encoding_fixed']:
-                            self.stats['encoding_fixed'] += 1
-                    else:
+                        progress = 10 + i / total * 85
+                        self._update_progress(progress, f"处理文件: {file_path.name}")
+                        
+                    except Exception as e:
                         self.stats['error_files'] += 1
-                    
-                    progress = 10 + (i + 1) / len(pending_files) * 85
-                    self._update_progress(progress, f"处理文件: {file_path.name}")
-                    
-                except Exception as e:
-                    self.stats['error_files'] += 1
-                    result["errors"].append(f"处理文件 {file_path.name} 时出错: {str(e)}")
+                        result["errors"].append(f"处理文件 {file_path.name} 时出错: {str(e)}")
             
             self._update_progress(98, "生成处理报告...")
             
@@ -417,8 +654,8 @@ class AutoClassificationWorkflow:
             self._create_classification_report(result)
             
             result["success"] = True
-            result["stats"] = self.stats.copy()
-            result["processing_log"] = self.processing_log.copy()
+            result["stats"] = dict(self.stats)
+            result["processing_log"] = list(self.processing_log)
             result["message"] = f"处理完成，成功分类 {self.stats['classified_files']} 个文件"
             
             self._update_progress(100, "自动分类完成！")
@@ -428,9 +665,9 @@ class AutoClassificationWorkflow:
             
         return result
     
-    def _process_single_file(self, file_path: Path) -> Dict:
-        """处理单个文件"""
-        result = {
+    def _new_file_result(self, file_path: Path) -> Dict:
+        """创建单个文件的处理结果"""
+        return {
             'filename': file_path.name,
             'success': False,
             'category': None,
@@ -438,45 +675,60 @@ class AutoClassificationWorkflow:
             'error': None,
             'is_secondary_check': False
         }
+    
+    def _classify_only(self, file_path: Path) -> tuple:
+        """
+        预览并分类单个文件，不移动文件（可在线程池中并发调用）
         
-        try:
-            self.stats['total_files'] += 1
-            
-            # 预览文件并修复编码
-            content, encoding_fixed = self.preview_and_fix_file(file_path)
-            result['encoding_fixed'] = encoding_fixed
-            
-            # 检查是否成功获取内容
-            if content.startswith("读取文件时出错") or content.startswith("预览失败"):
-                result['error'] = content
-                return result
-            
-            # 基于内容进行分类
-            category, score_info = self.classify_content(content, file_path.stem)
-            
-            if category == 'secondary_check':
-                # 移动到二次确认文件夹
-                if self.move_file(file_path, category, score_info):
-                    result['success'] = True
-                    result['category'] = '00-二次确认'
-                    result['is_secondary_check'] = True
-                else:
-                    result['error'] = "文件移动失败"
+        Returns:
+            tuple: (文件路径, 分类目录名或'secondary_check', 得分信息, 是否修复了编码, 错误信息)
+        """
+        # 预览文件并修复编码
+        content, encoding_fixed, has_fragment_markers = self.preview_and_fix_file(file_path)
+        
+        # 检查是否成功获取内容
+        if content.startswith("读取文件时出错") or content.startswith("预览失败"):
+            return file_path, None, None, encoding_fixed, content
+        
+        # 基于内容进行分类
+        category, score_info = self.classify_content(content, file_path.stem, has_fragment_markers)
+        return file_path, category, score_info, encoding_fixed, None
+    
+    def _apply_classification(self, classified: tuple) -> Dict:
+        """根据分类结果移动文件"""
+        file_path, category, score_info, encoding_fixed, error = classified
+        result = self._new_file_result(file_path)
+        result['encoding_fixed'] = encoding_fixed
+        
+        if error:
+            result['error'] = error
+            return result
+        
+        if category == 'secondary_check':
+            # 移动到二次确认文件夹
+            if self.move_file(file_path, category, score_info):
+                result['success'] = True
+                result['category'] = '00-二次确认'
+                result['is_secondary_check'] = True
             else:
-                # 移动到分类文件夹
-                if self.move_file(file_path, category):
-                    result['success'] = True
-                    result['category'] = category
-                else:
-                    result['error'] = "文件移动失败"
-            
-        except Exception as e:
-            result['error'] = str(e)
-            
+                result['error'] = "文件移动失败"
+        else:
+            # 移动到分类文件夹
+            if self.move_file(file_path, category):
+                result['success'] = True
+                result['category'] = category
+            else:
+                result['error'] = "文件移动失败"
+        
         return result
     
-    def _create_classification_report(self, process_result: Dict):
-        """创建分类报告"""
+    def _create_classification_report(self, process_result: Dict) -> Optional[threading.Thread]:
+        """
+        创建分类报告，序列化和写入文件在后台线程中进行
+        
+        Returns:
+            Optional[threading.Thread]: 写入报告的线程，创建失败时返回None
+        """
         try:
             logs_dir = self.library_path / "logs"
             logs_dir.mkdir(exist_ok=True)
@@ -484,11 +736,12 @@ class AutoClassificationWorkflow:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             report_file = logs_dir / f"classification_report_{timestamp}.json"
             
+            # 复制当前数据，后台写入期间不受后续批次影响
             report = {
                 "timestamp": datetime.now().isoformat(),
-                "classification_summary": self.stats,
-                "processing_log": self.processing_log,
-                "errors": process_result.get("errors", []),
+                "classification_summary": dict(self.stats),
+                "processing_log": list(self.processing_log),
+                "errors": list(process_result.get("errors", [])),
                 "config_info": {
                     "categories_count": len(self.categories),
                     "score_threshold": self.SCORE_THRESHOLD,
@@ -496,12 +749,25 @@ class AutoClassificationWorkflow:
                 }
             }
             
-            import json
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            # 非守护线程：程序退出前会等待报告写完
+            writer = threading.Thread(
+                target=self._write_classification_report,
+                args=(report_file, report),
+                name="ClassificationReportWriter"
+            )
+            writer.start()
+            return writer
                 
         except Exception as e:
             self.logger.error(f"创建分类报告失败: {e}")
+            return None
+    
+    def _write_classification_report(self, report_file: Path, report: Dict):
+        """写入分类报告文件"""
+        try:
+            write_json_atomic(report_file, report)
+        except Exception as e:
+            self.logger.error(f"创建分类报告失败: {e}")
     
     def get_classification_statistics(self) -> Dict:
         """获取分类统计信息"""
@@ -515,40 +781,82 @@ class AutoClassificationWorkflow:
         try:
             # 统计待分类文件
             if self.pending_dir.exists():
-                pending_files = list(self.pending_dir.glob("*.txt"))
-                stats["pending_count"] = len(pending_files)
+                stats["pending_count"] = self._count_txt_files(self.pending_dir)
             
             # 统计各分类目录的文件数量
             for category in self.categories.keys():
                 category_dir = self.library_path / category
                 if category_dir.exists():
-                    txt_files = list(category_dir.glob("*.txt"))
-                    stats["category_distribution"][category] = len(txt_files)
+                    stats["category_distribution"][category] = self._count_txt_files(category_dir)
             
             # 获取最近的分类记录
             logs_dir = self.library_path / "logs"
             if logs_dir.exists():
-                classification_reports = list(logs_dir.glob("classification_report_*.json"))
+                classification_reports = self._list_classification_reports(logs_dir)
                 if classification_reports:
-                    latest_report = max(classification_reports, key=lambda x: x.stat().st_mtime)
-                    stats["last_classification_time"] = datetime.fromtimestamp(latest_report.stat().st_mtime).isoformat()
+                    stats["last_classification_time"] = datetime.fromtimestamp(classification_reports[0][0]).isoformat()
                     
                     # 读取最近几次分类记录
-                    classification_reports.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-                    for report_file in classification_reports[:5]:
-                        try:
-                            import json
-                            with open(report_file, 'r', encoding='utf-8') as f:
-                                report_data = json.load(f)
-                                stats["recent_classifications"].append({
-                                    "timestamp": report_data["timestamp"],
-                                    "classified_count": report_data["classification_summary"]["classified_files"],
-                                    "secondary_check_count": report_data["classification_summary"]["secondary_check_files"]
-                                })
-                        except:
-                            continue
+                    for report_mtime, report_file in classification_reports[:5]:
+                        summary = self._read_report_summary(report_file, report_mtime)
+                        if summary is not None:
+                            stats["recent_classifications"].append(summary)
                             
         except Exception as e:
             stats["error"] = str(e)
             
         return stats
+    
+    def _count_txt_files(self, directory: Path) -> int:
+        """统计目录中的txt文件数，目录修改时间未变时直接使用缓存"""
+        mtime_ns = directory.stat().st_mtime_ns
+        cached = self._stats_cache.get(directory)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        
+        with os.scandir(directory) as entries:
+            count = sum(1 for entry in entries
+                        if entry.name.endswith('.txt') and not entry.name.startswith('.'))
+        self._stats_cache[directory] = (mtime_ns, count)
+        return count
+    
+    def _list_classification_reports(self, logs_dir: Path) -> List[tuple]:
+        """
+        列出分类报告，日志目录修改时间未变时直接使用缓存
+        
+        Returns:
+            List[tuple]: [(修改时间, 报告路径), ...]，按修改时间从新到旧排列
+        """
+        mtime_ns = logs_dir.stat().st_mtime_ns
+        cached = self._stats_cache.get(logs_dir)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        
+        reports = []
+        with os.scandir(logs_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('classification_report_') and entry.name.endswith('.json'):
+                    reports.append((entry.stat().st_mtime, Path(entry.path)))
+        reports.sort(key=lambda x: x[0], reverse=True)
+        self._stats_cache[logs_dir] = (mtime_ns, reports)
+        return reports
+    
+    def _read_report_summary(self, report_file: Path, report_mtime: float) -> Optional[Dict]:
+        """读取分类报告摘要，同一份报告只解析一次，读取失败时返回None"""
+        cache_key = (report_file, report_mtime)
+        if cache_key in self._report_cache:
+            return self._report_cache[cache_key]
+        
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                report_data = json.load(f)
+            summary = {
+                "timestamp": report_data["timestamp"],
+                "classified_count": report_data["classification_summary"]["classified_files"],
+                "secondary_check_count": report_data["classification_summary"]["secondary_check_files"]
+            }
+        except Exception:
+            summary = None
+        
+        self._report_cache[cache_key] = summary
+        return summary
@@ -15,14 +15,295 @@
 """
 
 import os
-import chardet
-import shutil
+import re
+import codecs
+from chardet.universaldetector import UniversalDetector
+import time
 import json
+from itertools import repeat
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Callable
 from core.logger_manager import get_logger
 from core.config_manager import ConfigManager
+from core.json_utils import write_json_atomic
+from core.file_utils import copy_file
+from core.encoding_utils import can_decode, bom_encoding
+
+# 文件数达到该值时才使用进程池扫描（进程启动有固定开销）
+_PARALLEL_SCAN_MIN_FILES = 64
+
+# 编码检测的初始样本大小与置信度不足时扩大后的样本大小
+_SMALL_SAMPLE_SIZE = 2048
+_LARGE_SAMPLE_SIZE = 16384
+
+# 判定纯ASCII所需的最小样本大小（样本太短时后面的多字节字符可能尚未出现）
+_MIN_CONFIDENT_SAMPLE = 5000
+
+# 逐文件进度回调的最小间隔（秒）
+_PROGRESS_INTERVAL = 0.1
+
+# 常用汉字范围
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+def _fast_detect(raw_data: bytes) -> Optional[tuple]:
+    """
+    通过BOM、纯ASCII和UTF-8严格解码快速判断编码，无需chardet
+    
+    Returns:
+        Optional[tuple]: (编码, 置信度)，无法快速判断时返回None
+    """
+    if not raw_data:
+        return None
+    encoding = bom_encoding(raw_data)
+    if encoding:
+        return encoding, 1.0
+    if raw_data.isascii():
+        return 'ascii', 1.0
+    if can_decode(raw_data, 'utf-8'):
+        return 'utf-8', 1.0
+    return None
+
+def _incremental_detect(raw_data: bytes, chunk_size: int = 1024, max_chunks: int = 10) -> dict:
+    """
+    分块喂给chardet增量检测器，检测器确定结果后立即停止
+    
+    最多处理 max_chunks 块，避免探测器迟迟不收敛时长时间卡住。
+    
+    Returns:
+        dict: 与 chardet.detect 相同格式的检测结果
+    """
+    detector = UniversalDetector()
+    for offset in range(0, min(len(raw_data), chunk_size * max_chunks), chunk_size):
+        detector.feed(raw_data[offset:offset + chunk_size])
+        # 任一探测器置信度足够高时 done 即被置位
+        if detector.done:
+            break
+    detector.close()
+    return detector.result
+
+def _iter_txt(root, recursive: bool = True):
+    """
+    使用 os.scandir 遍历目录，逐个返回txt文件（扩展名不区分大小写）
+    
+    Yields:
+        tuple: (文件路径, 文件大小)，大小取自目录项缓存的stat信息，获取失败时为None
+    """
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            # 无权限访问的子目录直接跳过，与 rglob 的行为一致
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith('.txt') and entry.is_file():
+                    try:
+                        size = entry.stat().st_size
+                    except OSError:
+                        size = None
+                    yield Path(entry.path), size
+
+def _existing_paths(path_strs) -> set:
+    """按所在目录批量列出文件，返回其中实际存在的路径集合"""
+    names_by_dir = {}
+    for path_str in path_strs:
+        directory, name = os.path.split(path_str)
+        names_by_dir.setdefault(directory, set()).add(name)
+    
+    existing = set()
+    for directory, names in names_by_dir.items():
+        try:
+            with os.scandir(directory or '.') as entries:
+                found = {entry.name for entry in entries} & names
+        except OSError:
+            continue
+        existing.update(os.path.join(directory, name) for name in found)
+    return existing
+
+def _detect_sample(raw_data: bytes, max_chunks: int = 10) -> dict:
+    """检测字节样本的编码：先快速判断常见编码，无法判断时再使用chardet检测"""
+    fast_result = _fast_detect(raw_data)
+    if fast_result:
+        return {'encoding': fast_result[0], 'confidence': fast_result[1]}
+    return _incremental_detect(raw_data, max_chunks=max_chunks)
+
+def _detect_stream(f, chunk_size: int = 2048) -> dict:
+    """
+    从已打开的二进制文件中增量检测编码
+    
+    先读取不少于 _MIN_CONFIDENT_SAMPLE 字节判断BOM、纯ASCII与UTF-8（样本太短时纯ASCII不可信），
+    无法判断时继续分块喂给chardet，直到检测器确定结果或达到 _LARGE_SAMPLE_SIZE。
+    """
+    raw_data = f.read(_MIN_CONFIDENT_SAMPLE)
+    fast_result = _fast_detect(raw_data)
+    if fast_result:
+        return {'encoding': fast_result[0], 'confidence': fast_result[1]}
+    
+    detector = UniversalDetector()
+    total = 0
+    chunk = raw_data
+    while chunk:
+        for offset in range(0, len(chunk), chunk_size):
+            detector.feed(chunk[offset:offset + chunk_size])
+            if detector.done:
+                break
+        total += len(chunk)
+        if detector.done or total >= _LARGE_SAMPLE_SIZE:
+            break
+        chunk = f.read(chunk_size)
+    detector.close()
+    return detector.result
+
+def _analyze_file_encoding_worker(path_str: str, size: Optional[int], min_confidence: float,
+                                  target_encoding: str, supported_encodings: frozenset,
+                                  detection_encodings: tuple) -> Dict:
+    """
+    分析单个文件的编码情况（模块级函数，可在子进程中执行）
+    
+    Args:
+        path_str: 文件路径
+        size: 文件大小，为None时重新获取
+        min_confidence: 最低置信度
+        target_encoding: 目标编码
+        supported_encodings: 支持修复的编码集合（小写）
+        detection_encodings: chardet检测失败时尝试的编码列表
+        
+    Returns:
+        Dict: 文件编码分析结果
+    """
+    file_path = Path(path_str)
+    info = {
+        "path": path_str,
+        "name": file_path.name,
+        "size": size if size is not None else file_path.stat().st_size,
+        "detected_encoding": None,
+        "confidence": 0.0,
+        "has_problem": False,
+        "problem_type": "",
+        "can_fix": False,
+        "needs_verification": False,  # 新增：是否需要人工确认
+        "content_preview": ""  # 新增：内容预览
+    }
+
+    try:
+        # 先读取较小的样本检测编码，置信度不足时再扩大样本重新检测一次
+        # 只读取少量字节，使用无缓冲的 os.read 避免创建缓冲读取对象
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        try:
+            raw_data = os.read(fd, _SMALL_SAMPLE_SIZE)
+            detection_result = _detect_sample(raw_data)
+            # 纯ASCII只说明样本开头没有非ASCII字符，文件更长时同样需要扩大样本
+            if info["size"] > len(raw_data) and (
+                    detection_result.get('confidence', 0.0) < min_confidence
+                    or detection_result.get('encoding') == 'ascii'):
+                raw_data += os.read(fd, _LARGE_SAMPLE_SIZE - len(raw_data))
+                detection_result = _detect_sample(raw_data, _LARGE_SAMPLE_SIZE // 1024)
+        finally:
+            os.close(fd)
+
+        if detection_result and detection_result.get('encoding'):
+            detected_encoding = detection_result.get('encoding', '')
+            info["detected_encoding"] = detected_encoding.lower() if detected_encoding else None
+            info["confidence"] = detection_result.get('confidence', 0.0)
+        else:
+            info["detected_encoding"] = None
+            info["confidence"] = 0.0
+
+        # 为ASCII文件添加内容预览
+        if info["detected_encoding"] == 'ascii':
+            try:
+                # 直接使用已读取的样本，统一换行符后取前200字符作为预览
+                content = raw_data[:200].decode('ascii').replace('\r\n', '\n').replace('\r', '\n')
+                info["content_preview"] = content.replace('\n', '\\n')[:100] + "..."
+            except:
+                info["content_preview"] = "无法读取内容预览"
+
+        # 判断是否有编码问题
+        if not info["detected_encoding"]:
+            # chardet无法检测编码，尝试常见编码
+            info["has_problem"] = True
+            info["problem_type"] = "无法检测编码，需要尝试常见编码"
+
+            can_read_with_common = False
+            working_encoding = None
+
+            for encoding in detection_encodings:
+                try:
+                    # 尝试读取文件
+                    with open(file_path, 'r', encoding=encoding, errors='strict') as f:
+                        content = f.read(1000)
+
+                    # 检查内容是否合理（包含中文字符或可打印字符）
+                    if _CJK_RE.search(content) or \
+                       (len(content) > 0 and content.isprintable()):
+                        working_encoding = encoding
+                        can_read_with_common = True
+                        break
+
+                except UnicodeDecodeError:
+                    # 严格模式失败，尝试容错模式
+                    try:
+                        with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+                            content = f.read(1000)
+
+                        # 容错模式下，检查是否包含合理内容（不全是替换字符）
+                        replacement_count = content.count('\ufffd')
+                        if len(content) - replacement_count > len(content) * 0.5:  # 至少一半字符是正常的
+                            working_encoding = encoding
+                            can_read_with_common = True
+                            break
+
+                    except Exception:
+                        continue
+                except Exception:
+                    continue
+
+            # 更新编码信息
+            if working_encoding:
+                info["detected_encoding"] = working_encoding
+                info["confidence"] = 0.8  # 给一个合理的置信度
+                info["problem_type"] = f"检测失败但可用{working_encoding}读取"
+
+            info["can_fix"] = can_read_with_common
+        elif info["confidence"] < min_confidence:
+            info["has_problem"] = True
+            info["problem_type"] = f"编码检测置信度过低 ({info['confidence']:.2f})"
+            info["can_fix"] = info["detected_encoding"] in supported_encodings
+        elif info["detected_encoding"] not in [target_encoding]:
+            # 包括ASCII在内的所有非UTF-8编码都需要转换
+            info["has_problem"] = True
+            if info["detected_encoding"] == 'ascii':
+                info["problem_type"] = f"ASCII编码文件 (建议转换为UTF-8)"
+            else:
+                info["problem_type"] = f"非目标编码 ({info['detected_encoding']})"
+            info["can_fix"] = info["detected_encoding"] in supported_encodings or info["detected_encoding"] == 'ascii'
+
+        # 额外验证：已读取的样本能否按目标编码解码
+        if not info["has_problem"] and not info["needs_verification"]:
+            if not can_decode(raw_data, target_encoding):
+                info["has_problem"] = True
+                info["problem_type"] = "UTF-8解码失败"
+                info["can_fix"] = info["detected_encoding"] in supported_encodings
+
+    except Exception as e:
+        info["has_problem"] = True
+        info["problem_type"] = f"分析失败: {str(e)}"
+        info["can_fix"] = False
+
+    return info
+
+def _scan_file_worker(path_str: str, size: Optional[int], *settings):
+    """扫描时使用的工作函数：出错时返回异常对象，避免一个文件出错中断整个批次"""
+    try:
+        return _analyze_file_encoding_worker(path_str, size, *settings)
+    except Exception as e:
+        return e
 
 class EncodingFixWorkflow:
     """编码修复工作流"""
@@ -42,13 +323,31 @@ class EncodingFixWorkflow:
         
         # 从配置获取编码设置
         self.target_encoding = self.config_manager.get_target_encoding()
-        self.supported_encodings = self.config_manager.get_supported_encodings()
+        # 检测结果均为小写，转为小写集合以便直接判断是否支持
+        self.supported_encodings = frozenset(
+            encoding.lower() for encoding in self.config_manager.get_supported_encodings())
+        self._detection_encodings = tuple(self.config_manager.get_detection_encodings())
         self.min_confidence = self.config_manager.get_min_confidence()
+        
+        # 上次回调进度的时间，用于限制逐文件进度更新的频率
+        self._last_progress_time = 0.0
     
-    def _update_progress(self, progress: float, message: str):
-        """更新进度"""
-        if self.progress_callback:
-            self.progress_callback(progress, message)
+    def _update_progress(self, progress: float, message: str, throttle: bool = False):
+        """
+        更新进度
+        
+        Args:
+            progress: 进度百分比
+            message: 进度消息
+            throttle: 是否限制回调频率（逐文件更新时使用，间隔不足时跳过）
+        """
+        if not self.progress_callback:
+            return
+        now = time.monotonic()
+        if throttle and progress < 100 and now - self._last_progress_time < _PROGRESS_INTERVAL:
+            return
+        self._last_progress_time = now
+        self.progress_callback(progress, message)
     
     def scan_encoding_issues(self, directory_path: str, recursive: bool = True) -> Dict:
         """
@@ -79,14 +378,9 @@ class EncodingFixWorkflow:
                 return result
             
             self._update_progress(5, "开始扫描编码问题...")
-              # 获取所有txt文件（去重处理）
-            if recursive:
-                txt_files = list(directory.rglob("*.txt")) + list(directory.rglob("*.TXT"))
-            else:
-                txt_files = list(directory.glob("*.txt")) + list(directory.glob("*.TXT"))
-            
-            # 去重：在Windows系统中，文件路径可能重复
-            txt_files = list(set(txt_files))
+            # 单次遍历获取所有txt文件（扩展名不区分大小写，不会重复）
+            txt_entries = list(_iter_txt(directory, recursive))
+            txt_files = [file_path for file_path, _ in txt_entries]
             
             result["total_files"] = len(txt_files)
             
@@ -94,10 +388,26 @@ class EncodingFixWorkflow:
                 result["errors"].append("目录中没有找到txt文件")
                 return result
             
-            # 逐个检查文件编码
-            for i, file_path in enumerate(txt_files):
-                try:
-                    file_info = self._analyze_file_encoding(file_path)
+            # chardet为纯Python实现，检测受GIL限制，文件较多时使用进程池并行检查
+            settings = self._analysis_settings()
+            path_strs = [str(file_path) for file_path in txt_files]
+            sizes = [size for _, size in txt_entries]
+            executor = None
+            if len(txt_files) >= _PARALLEL_SCAN_MIN_FILES:
+                executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+                file_infos = executor.map(_scan_file_worker, path_strs, sizes,
+                                          *[repeat(value) for value in settings],
+                                          chunksize=32)
+            else:
+                file_infos = (_scan_file_worker(path_str, size, *settings)
+                              for path_str, size in zip(path_strs, sizes))
+            
+            try:
+                # 汇总结果与进度回调都在主线程中完成
+                for i, (file_path, file_info) in enumerate(zip(txt_files, file_infos)):
+                    if isinstance(file_info, Exception):
+                        result["errors"].append(f"检查文件 {file_path.name} 时出错: {str(file_info)}")
+                        continue
                     
                     if file_info["has_problem"]:
                         result["problem_files"].append(file_info)
@@ -105,10 +415,10 @@ class EncodingFixWorkflow:
                         result["valid_files"].append(file_info)
                     
                     progress = 5 + (i + 1) / len(txt_files) * 90
-                    self._update_progress(progress, f"检查文件: {file_path.name}")
-                    
-                except Exception as e:
-                    result["errors"].append(f"检查文件 {file_path.name} 时出错: {str(e)}")
+                    self._update_progress(progress, f"检查文件: {file_path.name}", throttle=True)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
             
             self._update_progress(98, "生成扫描报告...")
             
@@ -126,134 +436,23 @@ class EncodingFixWorkflow:
             
         return result
     
-    def _analyze_file_encoding(self, file_path: Path) -> Dict:
+    def _analyze_file_encoding(self, file_path: Path, size: Optional[int] = None) -> Dict:
         """
         分析单个文件的编码情况
         
         Args:
             file_path: 文件路径
+            size: 文件大小（已知时传入，避免重复stat）
             
         Returns:
             Dict: 文件编码分析结果
         """
-        info = {
-            "path": str(file_path),
-            "name": file_path.name,
-            "size": file_path.stat().st_size,
-            "detected_encoding": None,
-            "confidence": 0.0,
-            "has_problem": False,
-            "problem_type": "",
-            "can_fix": False,
-            "needs_verification": False,  # 新增：是否需要人工确认
-            "content_preview": ""  # 新增：内容预览
-        }
-        
-        try:
-            # 读取文件的一部分内容进行编码检测
-            sample_size = min(info["size"], 10240)  # 最多读取10KB
-            
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(sample_size)
-            
-            # 使用chardet检测编码
-            detection_result = chardet.detect(raw_data)
-            
-            if detection_result and detection_result.get('encoding'):
-                detected_encoding = detection_result.get('encoding', '')
-                info["detected_encoding"] = detected_encoding.lower() if detected_encoding else None
-                info["confidence"] = detection_result.get('confidence', 0.0)
-            else:
-                info["detected_encoding"] = None
-                info["confidence"] = 0.0
-            
-            # 为ASCII文件添加内容预览
-            if info["detected_encoding"] == 'ascii':
-                try:
-                    with open(file_path, 'r', encoding='ascii') as f:
-                        content = f.read(200)  # 读取前200字符作为预览
-                        info["content_preview"] = content.replace('\n', '\\n')[:100] + "..."
-                except:
-                    info["content_preview"] = "无法读取内容预览"
-            
-            # 判断是否有编码问题
-            if not info["detected_encoding"]:
-                # chardet无法检测编码，尝试常见编码
-                info["has_problem"] = True
-                info["problem_type"] = "无法检测编码，需要尝试常见编码"
-                
-                # 从配置获取用于检测的编码列表
-                common_encodings = self.config_manager.get_detection_encodings()
-                can_read_with_common = False
-                working_encoding = None
-                
-                for encoding in common_encodings:
-                    try:
-                        # 尝试读取文件
-                        with open(file_path, 'r', encoding=encoding, errors='strict') as f:
-                            content = f.read(1000)
-                        
-                        # 检查内容是否合理（包含中文字符或可打印字符）
-                        if any('\u4e00' <= char <= '\u9fff' for char in content) or \
-                           (len(content) > 0 and content.isprintable()):
-                            working_encoding = encoding
-                            can_read_with_common = True
-                            break
-                            
-                    except UnicodeDecodeError:
-                        # 严格模式失败，尝试容错模式
-                        try:
-                            with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                                content = f.read(1000)
-                            
-                            # 容错模式下，检查是否包含合理内容（不全是替换字符）
-                            non_replacement_chars = [c for c in content if c != '�']
-                            if len(non_replacement_chars) > len(content) * 0.5:  # 至少一半字符是正常的
-                                working_encoding = encoding
-                                can_read_with_common = True
-                                break
-                                
-                        except Exception:
-                            continue
-                    except Exception:
-                        continue
-                
-                # 更新编码信息
-                if working_encoding:
-                    info["detected_encoding"] = working_encoding
-                    info["confidence"] = 0.8  # 给一个合理的置信度
-                    info["problem_type"] = f"检测失败但可用{working_encoding}读取"
-                
-                info["can_fix"] = can_read_with_common
-            elif info["confidence"] < self.min_confidence:
-                info["has_problem"] = True
-                info["problem_type"] = f"编码检测置信度过低 ({info['confidence']:.2f})"
-                info["can_fix"] = info["detected_encoding"] in self.supported_encodings
-            elif info["detected_encoding"] not in [self.target_encoding]:
-                # 包括ASCII在内的所有非UTF-8编码都需要转换
-                info["has_problem"] = True
-                if info["detected_encoding"] == 'ascii':
-                    info["problem_type"] = f"ASCII编码文件 (建议转换为UTF-8)"
-                else:
-                    info["problem_type"] = f"非目标编码 ({info['detected_encoding']})"
-                info["can_fix"] = info["detected_encoding"] in self.supported_encodings or info["detected_encoding"] == 'ascii'
-            
-            # 额外验证：尝试读取文件内容
-            if not info["has_problem"] and not info["needs_verification"]:
-                try:
-                    with open(file_path, 'r', encoding=self.target_encoding) as f:
-                        f.read(1000)  # 尝试读取前1000字符
-                except UnicodeDecodeError:
-                    info["has_problem"] = True
-                    info["problem_type"] = "UTF-8解码失败"
-                    info["can_fix"] = info["detected_encoding"] in self.supported_encodings
-            
-        except Exception as e:
-            info["has_problem"] = True
-            info["problem_type"] = f"分析失败: {str(e)}"
-            info["can_fix"] = False
-            
-        return info
+        return _analyze_file_encoding_worker(str(file_path), size, *self._analysis_settings())
+    
+    def _analysis_settings(self) -> tuple:
+        """编码分析所需的配置参数（传给子进程）"""
+        return (self.min_confidence, self.target_encoding, self.supported_encodings,
+                self._detection_encodings)
     
     def _save_scan_report(self, library_dir: Path, scan_result: Dict) -> Optional[str]:
         """保存扫描报告到日志文件"""
@@ -263,38 +462,39 @@ class EncodingFixWorkflow:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             report_file = logs_dir / f"encoding_scan_report_{timestamp}.json"
             
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(scan_result, f, ensure_ascii=False, indent=2)
+            write_json_atomic(report_file, scan_result)
             
             self.logger.info(f"扫描报告已保存到: {report_file}")
             
             # 额外保存问题文件清单，供修复使用
+            # 清单只是引用扫描结果中的同一个列表，不复制问题文件信息
+            problem_files = scan_result.get("problem_files", [])
             problem_list_file = logs_dir / "encoding_problems_current.json"
             problem_list = {
                 "timestamp": timestamp,
                 "scan_dir": scan_result.get("scan_dir", ""),
-                "problem_files": scan_result.get("problem_files", []),
-                "total_problems": len(scan_result.get("problem_files", [])),
+                "problem_files": problem_files,
+                "total_problems": len(problem_files),
                 "scan_report_file": str(report_file)
             }
             
-            with open(problem_list_file, 'w', encoding='utf-8') as f:
-                json.dump(problem_list, f, ensure_ascii=False, indent=2)
+            write_json_atomic(problem_list_file, problem_list)
             
             self.logger.info(f"问题文件清单已保存到: {problem_list_file}")
             
             # 额外保存简化的问题文件列表（仅包含文件路径）
             simple_problem_list_file = logs_dir / f"problem_files_{timestamp}.txt"
-            problem_files = scan_result.get("problem_files", [])
             if problem_files:
-                with open(simple_problem_list_file, 'w', encoding='utf-8') as f:
-                    f.write(f"# 编码问题文件清单\n")
-                    f.write(f"# 扫描时间: {timestamp}\n")
-                    f.write(f"# 总计问题文件: {len(problem_files)}\n")
-                    f.write(f"# 扫描目录: {scan_result.get('scan_dir', '')}\n\n")
-                    
-                    for file_info in problem_files:
-                        f.write(f"{file_info['path']}\n")
+                # 拼接完整内容后编码一次、写入一次
+                lines = [
+                    "# 编码问题文件清单\n",
+                    f"# 扫描时间: {timestamp}\n",
+                    f"# 总计问题文件: {len(problem_files)}\n",
+                    f"# 扫描目录: {scan_result.get('scan_dir', '')}\n\n",
+                ]
+                lines.extend(f"{file_info['path']}\n" for file_info in problem_files)
+                with open(simple_problem_list_file, 'wb') as f:
+                    f.write(''.join(lines).encode('utf-8'))
                 
                 self.logger.info(f"简化问题文件清单已保存到: {simple_problem_list_file}")
             
@@ -359,10 +559,11 @@ class EncodingFixWorkflow:
             # 过滤仍然存在且可修复的文件
             valid_problem_files = []
             total_files = len(problem_files)
+            # 按目录批量列出文件名，代替逐个文件stat
+            existing_paths = _existing_paths(file_info["path"] for file_info in problem_files)
             
             for i, file_info in enumerate(problem_files):
-                file_path = Path(file_info["path"])
-                file_exists = file_path.exists()
+                file_exists = file_info["path"] in existing_paths
                 can_fix = file_info.get("can_fix", False)
                 
                 if file_exists and can_fix:
@@ -406,7 +607,7 @@ class EncodingFixWorkflow:
             # 修复完成后，验证并更新清单
             if result["success"]:
                 self._update_progress(95, "验证修复结果...")
-                verified_result = self._verify_fix_results(valid_problem_files)
+                verified_result = self._verify_fix_results(valid_problem_files, result["fixed_files"])
                 result["verification"] = verified_result
                 
                 # 如果所有文件都修复成功，删除问题清单
@@ -426,8 +627,9 @@ class EncodingFixWorkflow:
             
         return result
     
-    def _verify_fix_results(self, problem_files: List[Dict]) -> Dict:
-        """验证修复结果"""
+    def _verify_fix_results(self, problem_files: List[Dict], fixed_files: List[Dict]) -> Dict:
+        """验证修复结果（只有修复成功的文件需要重新检查，其余文件仍视为有问题）"""
+        fixed_paths = {item["path"] for item in fixed_files}
         verification = {
             "total_files": len(problem_files),
             "fixed_files": 0,
@@ -445,24 +647,23 @@ class EncodingFixWorkflow:
                 "error": ""
             }
             
+            if file_info["path"] not in fixed_paths:
+                detail["error"] = "修复失败"
+                verification["still_problematic"] += 1
+                verification["details"].append(detail)
+                continue
+            
             try:
-                if file_path.exists():
-                    # 尝试用UTF-8读取文件
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read(100)  # 只读取前100字符验证
-                    
-                    # 检查是否还有编码问题
-                    current_info = self._analyze_file_encoding(file_path)
-                    if not current_info.get("has_problem", True):
-                        detail["fixed"] = True
-                        verification["fixed_files"] += 1
-                    else:
-                        detail["error"] = current_info.get("problem_type", "仍有编码问题")
-                        verification["still_problematic"] += 1
-                else:
-                    detail["error"] = "文件不存在"
-                    verification["still_problematic"] += 1
-                    
+                # 修复后的文件只需确认能按目标编码完整解码，无需重新检测编码
+                file_path.read_bytes().decode(self.target_encoding)
+                detail["fixed"] = True
+                verification["fixed_files"] += 1
+            except FileNotFoundError:
+                detail["error"] = "文件不存在"
+                verification["still_problematic"] += 1
+            except UnicodeDecodeError:
+                detail["error"] = "UTF-8解码失败"
+                verification["still_problematic"] += 1
             except Exception as e:
                 detail["error"] = f"验证失败: {str(e)}"
                 verification["still_problematic"] += 1
@@ -517,58 +718,61 @@ class EncodingFixWorkflow:
                 result["backup_dir"] = str(backup_path)
                 self._update_progress(5, f"创建备份目录: {backup_path}")
             
-            # 逐个修复文件
+            # 修复文件：读写以I/O为主，使用线程池并发执行
             total_files = len(fixable_files)
+            reserved_backups = set()
             
-            for i, file_info in enumerate(fixable_files):
-                try:
-                    file_path = Path(file_info["path"])
-                    
-                    # 创建备份
-                    if create_backup:
-                        backup_file = backup_path / file_path.name
-                        # 如果备份文件已存在，添加序号
-                        counter = 1
-                        original_backup = backup_file
-                        while backup_file.exists():
-                            stem = original_backup.stem
-                            suffix = original_backup.suffix
-                            backup_file = backup_path / f"{stem}_{counter}{suffix}"
-                            counter += 1
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+                tasks = []
+                for file_info in fixable_files:
+                    try:
+                        file_path = Path(file_info["path"])
+                        # 备份文件名在主线程中确定，避免并发时同名文件互相覆盖
+                        backup_file = (self._unique_backup_file(backup_path, file_path.name, reserved_backups)
+                                       if create_backup else None)
+                        future = executor.submit(self._backup_and_fix, file_path,
+                                                 file_info["detected_encoding"], backup_file)
+                    except Exception as e:
+                        backup_file, future = None, e
+                    tasks.append((file_info, backup_file, future))
+                
+                # 按原顺序汇总结果，统计与进度回调都在主线程中完成
+                for i, (file_info, backup_file, future) in enumerate(tasks):
+                    try:
+                        if isinstance(future, Exception):
+                            raise future
+                        fix_result = future.result()
                         
-                        shutil.copy2(file_path, backup_file)
-                    
-                    # 执行编码转换
-                    fix_result = self._fix_single_file(file_path, file_info["detected_encoding"])
-                    
-                    # 添加详细的调试信息
-                    self.logger.debug(f"处理文件 {file_info['name']} (第{i+1}/{total_files}个)")
-                    self.logger.debug(f"修复结果: {'成功' if fix_result['success'] else '失败'}")
-                    
-                    if fix_result["success"]:
-                        result["fixed_files"].append({
-                            "file": file_info["name"],
-                            "original_encoding": file_info["detected_encoding"],
-                            "target_encoding": self.target_encoding,
-                            "backup_file": str(backup_file) if create_backup else None,
-                            "method": fix_result.get("method", "未知")
-                        })
-                        self.logger.debug("文件已添加到修复成功列表")
-                    else:
+                        # 添加详细的调试信息
+                        self.logger.debug(f"处理文件 {file_info['name']} (第{i+1}/{total_files}个)")
+                        self.logger.debug(f"修复结果: {'成功' if fix_result['success'] else '失败'}")
+                        
+                        if fix_result["success"]:
+                            result["fixed_files"].append({
+                                "file": file_info["name"],
+                                "path": file_info["path"],
+                                "original_encoding": file_info["detected_encoding"],
+                                "target_encoding": self.target_encoding,
+                                "backup_file": str(backup_file) if create_backup else None,
+                                "method": fix_result.get("method", "未知")
+                            })
+                            self.logger.debug("文件已添加到修复成功列表")
+                        else:
+                            result["failed_files"].append({
+                                "file": file_info["name"],
+                                "error": fix_result["error"]
+                            })
+                            self.logger.debug(f"文件已添加到修复失败列表，原因: {fix_result['error']}")
+                        
+                        progress = 10 + (i + 1) / total_files * 85  # 从10%到95%
+                        self._update_progress(progress, f"修复文件: {file_info['name']} ({i+1}/{total_files})",
+                                              throttle=True)
+                        
+                    except Exception as e:
                         result["failed_files"].append({
                             "file": file_info["name"],
-                            "error": fix_result["error"]
+                            "error": str(e)
                         })
-                        self.logger.debug(f"文件已添加到修复失败列表，原因: {fix_result['error']}")
-                    
-                    progress = 10 + (i + 1) / total_files * 85  # 从10%到95%
-                    self._update_progress(progress, f"修复文件: {file_info['name']} ({i+1}/{total_files})")
-                    
-                except Exception as e:
-                    result["failed_files"].append({
-                        "file": file_info["name"],
-                        "error": str(e)
-                    })
             
             # 跳过的文件
             skipped_count = len(problem_files) - len(fixable_files)
@@ -593,6 +797,23 @@ class EncodingFixWorkflow:
             
         return result
     
+    @staticmethod
+    def _unique_backup_file(backup_path: Path, file_name: str, reserved: set) -> Path:
+        """获取不重复的备份文件路径，已存在或本次已分配时添加序号"""
+        backup_file = backup_path / file_name
+        counter = 1
+        while backup_file.name in reserved or backup_file.exists():
+            backup_file = backup_path / f"{Path(file_name).stem}_{counter}{Path(file_name).suffix}"
+            counter += 1
+        reserved.add(backup_file.name)
+        return backup_file
+    
+    def _backup_and_fix(self, file_path: Path, source_encoding: str, backup_file: Optional[Path]) -> Dict:
+        """备份（如需要）并修复单个文件，在线程池中执行"""
+        if backup_file is not None:
+            copy_file(file_path, backup_file)
+        return self._fix_single_file(file_path, source_encoding)
+    
     def _fix_single_file(self, file_path: Path, source_encoding: str) -> Dict:
         """
         修复单个文件的编码
@@ -612,15 +833,15 @@ class EncodingFixWorkflow:
         self.logger.debug(f"开始修复文件: {file_path.name}")
         self.logger.debug(f"检测到的编码: {source_encoding}")
         
-        # 检查文件是否存在
-        if not file_path.exists():
+        # 检查文件是否存在及文件大小
+        try:
+            file_size = file_path.stat().st_size
+        except FileNotFoundError:
             result["error"] = f"文件不存在: {file_path}"
             result["debug_info"].append(f"错误: 文件不存在")
             self.logger.debug(f"错误 - 文件不存在: {file_path}")
             return result
-            
-        # 检查文件大小
-        file_size = file_path.stat().st_size
+        
         result["debug_info"].append(f"文件大小: {file_size} 字节")
         self.logger.debug(f"文件大小: {file_size} 字节")
         
@@ -661,21 +882,21 @@ class EncodingFixWorkflow:
         content = None
         successful_strategy = None
         
+        # 只读取一次文件，各策略在内存中解码（保留原有换行符）
+        raw_data = file_path.read_bytes()
+        
+        # 带BOM的文件优先按BOM对应的编码严格解码
+        bom_enc = bom_encoding(raw_data)
+        if bom_enc:
+            strategies.insert(0, {"encoding": bom_enc, "errors": "strict", "name": f"按BOM使用{bom_enc}"})
+        
         # 尝试各种策略
         for i, strategy in enumerate(strategies):
             try:
                 result["debug_info"].append(f"尝试策略{i+1}: {strategy['name']}")
                 self.logger.debug(f"尝试策略{i+1}: {strategy['name']}")
                 
-                if strategy["name"] == "二进制读取后UTF-8解码":
-                    # 特殊策略：二进制读取
-                    with open(file_path, 'rb') as f:
-                        raw_data = f.read()
-                    content = raw_data.decode('utf-8', errors='replace')
-                else:
-                    # 常规策略
-                    with open(file_path, 'r', encoding=strategy["encoding"], errors=strategy["errors"]) as f:
-                        content = f.read()
+                content = raw_data.decode(strategy["encoding"], errors=strategy["errors"])
                 
                 successful_strategy = strategy
                 result["debug_info"].append(f"策略成功: {strategy['name']}")
@@ -693,48 +914,38 @@ class EncodingFixWorkflow:
         if content is not None:
             try:
                 # 清理内容：将替换字符(�)替换为空格
+                # 单字符替换 str.replace 最快（没有替换字符时直接返回原字符串），
+                # str.translate 对非ASCII映射逐字符查表，实测慢约千倍
                 original_length = len(content)
-                content = content.replace('�', ' ')
+                content = content.replace('\ufffd', ' ')
                 cleaned_length = len(content)
                 result["debug_info"].append(f"内容清理: 原始长度 {original_length}, 清理后长度 {cleaned_length}")
                 self.logger.debug(f"内容清理 - 原始长度: {original_length}, 清理后长度: {cleaned_length}")
                 
                 # 创建临时备份以防写入失败
-                temp_file = file_path.with_suffix('.tmp')
+                temp_file = file_path.with_name(f"{file_path.name}.tmp")
                 result["debug_info"].append(f"创建临时文件: {temp_file}")
                 self.logger.debug(f"创建临时文件: {temp_file}")
                 
-                # 写入临时文件
-                with open(temp_file, 'w', encoding=self.target_encoding) as f:
-                    f.write(content)
+                # 写入临时文件：整体编码一次后一次性写入
+                with open(temp_file, 'wb') as f:
+                    f.write(content.encode(self.target_encoding))
                 self.logger.debug("内容已写入临时文件")
                 
-                # 验证临时文件
-                with open(temp_file, 'r', encoding=self.target_encoding) as f:
-                    verify_content = f.read()
+                # 编码与写入成功即可保证内容完整，直接替换原文件
+                temp_file.replace(file_path)
+                result["debug_info"].append("文件写入成功，已替换原文件")
+                self.logger.debug("文件写入成功，已替换原文件")
                 
-                if len(verify_content) == len(content):
-                    # 替换原文件
-                    temp_file.replace(file_path)
-                    result["debug_info"].append("文件写入验证成功，已替换原文件")
-                    self.logger.debug("文件写入验证成功，已替换原文件")
-                    
-                    result["success"] = True
-                    result["method"] = successful_strategy["name"]
-                else:
-                    result["error"] = f"文件验证失败: 原内容长度 {len(content)}, 验证长度 {len(verify_content)}"
-                    result["debug_info"].append(f"错误: 文件验证失败")
-                    self.logger.debug(f"错误 - 文件验证失败: 原内容长度 {len(content)}, 验证长度 {len(verify_content)}")
-                    # 清理临时文件
-                    if temp_file.exists():
-                        temp_file.unlink()
+                result["success"] = True
+                result["method"] = successful_strategy["name"]
                 
             except Exception as e:
                 result["error"] = f"写入文件失败: {str(e)}"
                 result["debug_info"].append(f"错误: 写入文件失败 - {str(e)}")
                 self.logger.debug(f"错误 - 写入文件失败: {str(e)}")
                 # 清理临时文件
-                temp_file = file_path.with_suffix('.tmp')
+                temp_file = file_path.with_name(f"{file_path.name}.tmp")
                 if temp_file.exists():
                     temp_file.unlink()
         else:
@@ -757,8 +968,7 @@ class EncodingFixWorkflow:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             report_file = logs_dir / f"encoding_fix_report_{timestamp}.json"
             
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(fix_result, f, ensure_ascii=False, indent=2)
+            write_json_atomic(report_file, fix_result)
                 
         except Exception as e:
             self.logger.error(f"创建修复报告失败: {e}")
@@ -785,7 +995,7 @@ class EncodingFixWorkflow:
             library_dir = Path(library_path)
             
             # 扫描所有txt文件
-            txt_files = list(library_dir.rglob("*.txt"))
+            txt_files = [file_path for file_path, _ in _iter_txt(library_dir)]
             stats["total_files"] = len(txt_files)
             
             # 快速检查前100个文件的编码分布（避免全扫描太慢）
@@ -794,9 +1004,7 @@ class EncodingFixWorkflow:
             for file_path in sample_files:
                 try:
                     with open(file_path, 'rb') as f:
-                        raw_data = f.read(1024)  # 读取1KB样本
-                    
-                    detection = chardet.detect(raw_data)
+                        detection = _detect_stream(f)
                     if detection and detection['encoding']:
                         encoding = detection['encoding'].lower()
                         stats["encoding_distribution"][encoding] = stats["encoding_distribution"].get(encoding, 0) + 1
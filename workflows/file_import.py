@@ -13,13 +13,227 @@
 """
 
 import os
-import shutil
+import re
+import errno
+import json
+import codecs
+import time
 import hashlib
+from collections import deque, Counter
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from typing import Dict, List, Optional, Callable, Set
 from core.logger_manager import get_logger
 from core.config_manager import ConfigManager
+from core.json_utils import write_json_atomic
+from core.file_utils import copy_file
+
+try:
+    from blake3 import blake3
+except ImportError:  # 可选依赖
+    blake3 = None
+
+# 去重使用的校验和算法：安装了blake3时使用其SIMD实现，否则使用MD5
+# （报告和索引中每个校验和都附带算法名称，不同算法的校验和不会混用）
+_HASH_KIND = "blake3" if blake3 is not None else "md5"
+
+# 计算校验和时每次读取的字节数
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# 逐文件进度回调的最小间隔（秒）
+_PROGRESS_INTERVAL = 0.1
+
+# 连续空白字符
+_WS_RE = re.compile(r'\s+')
+
+# 删除Windows文件系统不支持的字符的转换表
+_INVALID_TRANS = str.maketrans('', '', '<>:"|?*')
+
+def _calculate_checksum(path_str: str) -> str:
+    """
+    计算文件校验和（模块级函数，可在线程池中并发执行），失败时返回空字符串
+    
+    算法由 _HASH_KIND 决定，blake3 截取128位摘要，与MD5同为32个十六进制字符。
+    """
+    hash_obj = blake3() if blake3 is not None else hashlib.md5()
+    # 不使用mmap：源文件在网络共享或移动设备上被截断时，访问映射会触发SIGBUS直接终止进程
+    # 使用1MB缓冲区循环 readinto，不为每块分配新的bytes对象
+    buffer = bytearray(_HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    try:
+        with open(path_str, "rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                hash_obj.update(view[:n])
+        if blake3 is not None:
+            return hash_obj.hexdigest(length=16)
+        return hash_obj.hexdigest()
+    except:
+        return ""
+
+def _fast_move(src, dst):
+    """
+    移动文件：同一文件系统内只需一次 rename，跨设备时复制后删除源文件
+    
+    目标文件名由调用方保证唯一，不检查目标是否已存在。
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    # 复制失败时 copy_file 会删除不完整的目标文件，源文件保持不变
+    copy_file(src, dst)
+    os.unlink(src)
+
+def _is_readable_text(content: str) -> bool:
+    """检查文本是否包含基本内容且不全是乱码"""
+    # 检查是否包含基本的文本内容
+    if len(content.strip()) > 10:
+        # 检查是否包含可读的字符（不全是乱码）
+        readable_chars = sum(1 for c in content if c.isprintable() or c in '\n\r\t　')
+        return readable_chars > len(content) * 0.5  # 至少50%是可读字符
+    return False
+
+def _iter_files(root, recursive: bool = True, suffix: Optional[str] = None):
+    """
+    使用 os.scandir 遍历目录，逐个返回文件的目录项
+    
+    目录项自带文件类型（多数平台上还缓存了stat信息），无需再对每个文件单独stat。
+    
+    Args:
+        root: 根目录
+        recursive: 是否递归遍历子目录
+        suffix: 只返回该扩展名的文件（不区分大小写），为None时返回所有文件
+    """
+    pending = deque([root])
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            # 无权限访问的子目录直接跳过，与 rglob 的行为一致
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(entry.path)
+                elif entry.is_file() and (suffix is None or entry.name.lower().endswith(suffix)):
+                    yield entry
+
+def _scan_directory(path: str):
+    """列出单个目录中的文件目录项与子目录路径，目录无法访问时返回空结果"""
+    files, subdirs = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry)
+    except OSError:
+        pass
+    return files, subdirs
+
+def _parallel_scan(root, workers: int = 8) -> list:
+    """
+    多线程递归遍历目录，返回所有文件的目录项（按路径排序）
+    
+    各线程并发读取不同目录，在网络共享或机械硬盘上可重叠目录读取的等待时间；
+    新发现的子目录在主线程中提交，无需额外加锁。
+    """
+    files = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(_scan_directory, os.fspath(root))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                dir_files, subdirs = future.result()
+                files.extend(dir_files)
+                pending.update(executor.submit(_scan_directory, subdir) for subdir in subdirs)
+    # 完成顺序不固定，排序以保证重名与重复文件的处理结果稳定
+    files.sort(key=lambda entry: entry.path)
+    return files
+
+class _IndexStore:
+    """
+    待分类目录的校验和索引，保存在目录下的 .md5_index.json 中
+    
+    记录 文件名 -> [大小, 修改时间(ns), 校验和, 算法]，大小和修改时间都未变化且算法与当前相同的文件
+    直接复用记录的校验和，多次导入之间无需重复计算。
+    """
+    
+    FILE_NAME = ".md5_index.json"
+    
+    def __init__(self, directory: Path):
+        self.index_file = Path(directory) / self.FILE_NAME
+        self.entries: Dict[str, list] = {}
+        self._dirty = False
+    
+    def load(self):
+        """读取索引文件，文件不存在或已损坏时从空索引开始"""
+        try:
+            with open(self.index_file, 'rb') as f:
+                data = json.loads(f.read())
+            entries = data.get("entries")
+            self.entries = entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+        self._dirty = False
+    
+    def save(self):
+        """索引有变化时写回文件（写入失败只影响下次导入的速度，不影响导入结果）"""
+        if not self._dirty:
+            return
+        try:
+            write_json_atomic(self.index_file, {"entries": self.entries}, indent=False)
+            self._dirty = False
+        except OSError:
+            pass
+    
+    def prune(self, names: Set[str]):
+        """移除已不在目录中的文件的记录"""
+        for name in [name for name in self.entries if name not in names]:
+            del self.entries[name]
+            self._dirty = True
+    
+    def add(self, name: str, size: int, mtime_ns: int, checksum: str):
+        """记录文件的校验和"""
+        self.entries[name] = [size, mtime_ns, checksum, _HASH_KIND]
+        self._dirty = True
+    
+    def lookup(self, path_str: str):
+        """
+        查找文件的有效记录
+        
+        Returns:
+            (校验和, stat结果)：记录有效时校验和为记录值，需要重新计算（包括算法不同）时为None；
+            文件无法访问时stat结果为None
+        """
+        try:
+            st = os.stat(path_str)
+        except OSError:
+            return None, None
+        entry = self.entries.get(os.path.basename(path_str))
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns and entry[3:4] == [_HASH_KIND]:
+            return entry[2], st
+        return None, st
+    
+    def get_or_compute(self, path_str: str) -> str:
+        """返回文件的校验和：记录仍然有效时直接使用，否则重新计算并记录"""
+        checksum, st = self.lookup(path_str)
+        if checksum is not None:
+            return checksum
+        if st is None:
+            return ""
+        checksum = _calculate_checksum(path_str)
+        if checksum:
+            self.add(os.path.basename(path_str), st.st_size, st.st_mtime_ns, checksum)
+        return checksum
 
 class FileImportWorkflow:
     """文件导入工作流"""
@@ -36,20 +250,39 @@ class FileImportWorkflow:
         
         # 初始化配置管理器
         self.config_manager = ConfigManager()
+        # 验证文件内容使用的编码列表，只读取一次配置
+        self._validation_encodings = tuple(self.config_manager.get_validation_encodings())
         
         # 支持的文件扩展名
         self.supported_extensions = {'.txt', '.TXT'}
+        # 小写形式的扩展名集合，分析文件时直接查找，无需每次重新构建
+        self._supported_ext_lower = frozenset(ext.lower() for ext in self.supported_extensions)
         
         # 最小文件大小（字节），过滤掉过小的文件
         self.min_file_size = 1024  # 1KB
         
         # 最大文件大小（字节），避免处理过大的文件
         self.max_file_size = 100 * 1024 * 1024  # 100MB
+        
+        # 上次进度回调的时间
+        self._last_progress_time = 0.0
     
-    def _update_progress(self, progress: float, message: str):
-        """更新进度"""
-        if self.progress_callback:
-            self.progress_callback(progress, message)
+    def _update_progress(self, progress: float, message: str, throttle: bool = False):
+        """
+        更新进度
+        
+        Args:
+            progress: 进度百分比
+            message: 进度消息
+            throttle: 是否限制回调频率（逐文件更新时使用，间隔不足时跳过）
+        """
+        if not self.progress_callback:
+            return
+        now = time.monotonic()
+        if throttle and progress < 100 and now - self._last_progress_time < _PROGRESS_INTERVAL:
+            return
+        self._last_progress_time = now
+        self.progress_callback(progress, message)
     
     def scan_source_directory(self, source_path: str, recursive: bool = True) -> Dict:
         """
@@ -84,24 +317,34 @@ class FileImportWorkflow:
             
             self._update_progress(10, "开始扫描文件...")
             
-            # 获取所有文件
-            if recursive:
-                all_files = list(source_dir.rglob("*"))
-            else:
-                all_files = list(source_dir.glob("*"))
+            # 单次遍历获取所有文件（递归时多线程并发读取各级目录）
+            entries = _parallel_scan(source_dir) if recursive else _iter_files(source_dir, recursive=False)
             
-            # 筛选文件
-            files_to_check = [f for f in all_files if f.is_file()]
-            result["total_files"] = len(files_to_check)
+            # 先用目录项中的信息检查扩展名和大小，只有通过的文件才需要读取内容验证
+            file_infos = []
+            candidates = []
+            for entry in entries:
+                file_info = self._precheck_entry(entry)
+                file_infos.append(file_info)
+                if not file_info["reason"]:
+                    candidates.append(file_info)
+            result["total_files"] = len(file_infos)
             
-            if not files_to_check:
+            if not file_infos:
                 result["errors"].append("源目录中没有找到任何文件")
                 return result
             
-            # 检查每个文件
-            for i, file_path in enumerate(files_to_check):
-                try:
-                    file_info = self._analyze_file(file_path)
+            # 内容验证在线程池中并发读取，结果按文件顺序在主线程中汇总
+            with ThreadPoolExecutor(max_workers=max(1, min(8, len(candidates)))) as executor:
+                validations = executor.map(self._validate_text_content, [info["path"] for info in candidates])
+                
+                for i, file_info in enumerate(file_infos):
+                    if not file_info["reason"]:
+                        if next(validations):
+                            file_info["is_valid"] = True
+                            file_info["reason"] = "有效的小说文件"
+                        else:
+                            file_info["reason"] = "文件内容无效或编码问题"
                     
                     if file_info["is_valid"]:
                         result["valid_files"].append(file_info)
@@ -109,16 +352,8 @@ class FileImportWorkflow:
                     else:
                         result["invalid_files"].append(file_info)
                     
-                    progress = 10 + (i + 1) / len(files_to_check) * 80
-                    self._update_progress(progress, f"分析文件: {file_path.name}")
-                    
-                except Exception as e:
-                    result["invalid_files"].append({
-                        "path": str(file_path),
-                        "name": file_path.name,
-                        "error": str(e),
-                        "is_valid": False
-                    })
+                    progress = 10 + (i + 1) / len(file_infos) * 80
+                    self._update_progress(progress, f"分析文件: {file_info['name']}", throttle=True)
             
             self._update_progress(95, "扫描完成，正在生成报告...")
             
@@ -132,33 +367,45 @@ class FileImportWorkflow:
             
         return result
     
-    def _analyze_file(self, file_path: Path) -> Dict:
+    def _precheck_entry(self, entry: os.DirEntry) -> Dict:
+        """使用目录项中的文件名和大小检查文件（大小取自目录项的stat缓存，不读取文件内容）"""
+        try:
+            size = entry.stat().st_size
+        except OSError:
+            size = None  # 交给预检查重新stat并记录失败原因
+        return self._precheck_file(entry.path, entry.name, size)
+    
+    def _precheck_file(self, path_str: str, name: str, size: Optional[int] = None) -> Dict:
         """
-        分析单个文件是否为有效的小说文件
+        检查文件的扩展名和大小（不读取文件内容）
+        
+        直接使用字符串路径，批量扫描时无需为每个文件构造 Path 对象。
         
         Args:
-            file_path: 文件路径
+            path_str: 文件路径
+            name: 文件名
+            size: 已知的文件大小（如来自目录项），为None时重新stat
             
         Returns:
-            Dict: 文件分析结果
+            Dict: 文件分析结果，未通过检查时 reason 中记录原因，通过时 reason 为空
         """
         info = {
-            "path": str(file_path),
-            "name": file_path.name,
+            "path": path_str,
+            "name": name,
             "size": 0,
-            "extension": file_path.suffix,
+            "extension": os.path.splitext(name)[1],
             "is_valid": False,
             "reason": "",
-            "md5": "",
+            "checksum": "",
             "relative_path": ""
         }
         
         try:
             # 检查文件大小
-            info["size"] = file_path.stat().st_size
+            info["size"] = os.stat(path_str).st_size if size is None else size
             
             # 检查扩展名
-            if info["extension"].lower() not in {ext.lower() for ext in self.supported_extensions}:
+            if info["extension"].lower() not in self._supported_ext_lower:
                 info["reason"] = f"不支持的文件类型: {info['extension']}"
                 return info
             
@@ -171,51 +418,33 @@ class FileImportWorkflow:
                 info["reason"] = f"文件过大: {info['size']} 字节"
                 return info
             
-            # 计算MD5校验和
-            info["md5"] = self._calculate_md5(file_path)
-            
-            # 尝试读取文件内容进行基本验证
-            if not self._validate_text_content(file_path):
-                info["reason"] = "文件内容无效或编码问题"
-                return info
-            
-            info["is_valid"] = True
-            info["reason"] = "有效的小说文件"
-            
         except Exception as e:
             info["reason"] = f"分析失败: {str(e)}"
             
         return info
     
-    def _calculate_md5(self, file_path: Path) -> str:
-        """计算文件MD5校验和"""
-        hash_md5 = hashlib.md5()
-        try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
-        except:
-            return ""
-    
-    def _validate_text_content(self, file_path: Path) -> bool:
+    def _validate_text_content(self, file_path) -> bool:
         """验证文本文件内容的有效性"""
         try:
-            # 从配置管理器获取用于验证的编码列表
-            encodings = self.config_manager.get_validation_encodings()
-            
-            for encoding in encodings:
+            # 只读取一次文件开头的字节，各编码在内存中分别解码
+            # （1000个字符在常见编码下不超过4096字节）
+            with open(file_path, 'rb') as f:
+                raw_data = f.read(4096)
+            
+            # 大多数文件是UTF-8编码：严格解码成功（容忍末尾被截断的字符）时直接判断，无需逐个尝试编码
+            try:
+                content = codecs.getincrementaldecoder('utf-8-sig')().decode(raw_data, final=False)
+                if _is_readable_text(content[:1000]):
+                    return True
+            except UnicodeDecodeError:
+                pass
+            
+            for encoding in self._validation_encodings:
                 try:
-                    with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-                        # 读取前1000字符进行验证
-                        content = f.read(1000)
-                        
-                        # 检查是否包含基本的文本内容
-                        if len(content.strip()) > 10:
-                            # 检查是否包含可读的字符（不全是乱码）
-                            readable_chars = sum(1 for c in content if c.isprintable() or c in '\n\r\t　')
-                            if readable_chars > len(content) * 0.5:  # 至少50%是可读字符
-                                return True
+                    # 读取前1000字符进行验证
+                    content = raw_data.decode(encoding, errors='ignore')[:1000]
+                    if _is_readable_text(content):
+                        return True
                 except UnicodeDecodeError:
                     continue
                 except Exception:
@@ -253,60 +482,108 @@ class FileImportWorkflow:
         try:
             library_dir = Path(target_library)
             pending_dir = library_dir / "00-待分类"
+            pending_dir_str = str(pending_dir)
             
             # 检查目标目录
             if not pending_dir.exists():
                 result["errors"].append("目标小说库的待分类目录不存在")
                 return result
             
-            # 获取已存在文件的MD5集合，用于去重
-            existing_md5s = self._get_existing_file_md5s(pending_dir)
+            # 按大小索引已存在的文件：只有大小相同的文件才可能重复，才需要计算校验和
+            size_index = self._index_existing_by_size(pending_dir)
+            # 一次列出已有文件名，生成目标文件名时无需逐个检查文件是否存在
+            existing_names = self._list_existing_names(pending_dir)
+            checksum_cache = {}
+            # 跨多次导入保存的校验和索引，已分类移走的文件的记录一并清理
+            index_store = _IndexStore(pending_dir)
+            index_store.load()
+            index_store.prune({os.path.basename(path) for paths in size_index.values() for path in paths})
+            
+            # 大小有冲突的文件预先并发计算校验和，其余文件不可能重复，无需计算
+            self._prehash_size_collisions(valid_files, size_index, checksum_cache, index_store)
             
             total_files = len(valid_files)
+            # 已提交但可能尚未完成的文件操作（目标路径 -> future）
+            pending_ops = {}
+            ops = []
             
-            for i, file_info in enumerate(valid_files):
-                try:
-                    source_path = Path(file_info["path"])
-                    
-                    # 检查是否重复（通过MD5）
-                    if file_info["md5"] in existing_md5s:
-                        result["skipped_files"].append({
+            # 去重和命名在主线程中依次决定，只有复制/移动操作并发执行
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                for i, file_info in enumerate(valid_files):
+                    try:
+                        source_path = file_info["path"]
+                        
+                        # 检查是否重复（大小相同时再比较校验和）
+                        candidates = size_index.get(file_info["size"])
+                        if candidates:
+                            if not file_info["checksum"]:
+                                file_info["checksum"] = _calculate_checksum(file_info["path"])
+                            if file_info["checksum"] and self._is_duplicate(
+                                    file_info["checksum"], candidates, checksum_cache, pending_ops, index_store):
+                                result["skipped_files"].append({
+                                    "file": file_info["name"],
+                                    "reason": "文件已存在（校验和重复）"
+                                })
+                                continue
+                        
+                        # 生成目标文件名（处理冲突）
+                        target_name = self._generate_unique_filename(pending_dir, os.path.basename(source_path), existing_names)
+                        target_path = os.path.join(pending_dir_str, target_name)
+                        
+                        # 提交文件操作
+                        if import_mode == "move":
+                            future = executor.submit(_fast_move, source_path, target_path)
+                        else:
+                            future = executor.submit(copy_file, source_path, target_path)
+                        
+                        # 已导入的文件加入索引，本次导入中的重复文件同样会被跳过
+                        size_index.setdefault(file_info["size"], []).append(target_path)
+                        if file_info["checksum"]:
+                            checksum_cache[target_path] = file_info["checksum"]
+                        pending_ops[target_path] = future
+                        ops.append((i, file_info, target_name, future))
+                        
+                    except Exception as e:
+                        result["failed_files"].append({
                             "file": file_info["name"],
-                            "reason": "文件已存在（MD5重复）"
+                            "error": str(e)
+                        })
+                
+                # 按提交顺序在主线程中汇总结果并更新进度
+                operation = "移动" if import_mode == "move" else "复制"
+                for i, file_info, target_name, future in ops:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        result["failed_files"].append({
+                            "file": file_info["name"],
+                            "error": str(e)
                         })
                         continue
                     
-                    # 生成目标文件名（处理冲突）
-                    target_name = self._generate_unique_filename(pending_dir, source_path.name)
-                    target_path = pending_dir / target_name
-                    
-                    # 执行文件操作
-                    if import_mode == "move":
-                        shutil.move(str(source_path), str(target_path))
-                        operation = "移动"
-                    else:
-                        shutil.copy2(str(source_path), str(target_path))
-                        operation = "复制"
-                    
                     result["imported_files"].append({
                         "original_name": file_info["name"],
                         "target_name": target_name,
                         "size": file_info["size"],
                         "operation": operation,
-                        "md5": file_info["md5"]
+                        "checksum": file_info["checksum"],
+                        "hash_kind": _HASH_KIND
                     })
                     
                     result["total_imported"] += 1
-                    existing_md5s.add(file_info["md5"])
                     
-                    progress = (i + 1) / total_files * 100
-                    self._update_progress(progress, f"{operation}文件: {target_name}")
+                    # 已计算过校验和的文件直接写入索引
+                    if file_info["checksum"]:
+                        try:
+                            st = os.stat(os.path.join(pending_dir_str, target_name))
+                            index_store.add(target_name, st.st_size, st.st_mtime_ns, file_info["checksum"])
+                        except OSError:
+                            pass
                     
-                except Exception as e:
-                    result["failed_files"].append({
-                        "file": file_info["name"],
-                        "error": str(e)
-                    })
+                    progress = (i + 1) / total_files * 100
+                    self._update_progress(progress, f"{operation}文件: {target_name}", throttle=True)
+            
+            index_store.save()
             
             result["success"] = True
             result["message"] = f"成功导入 {result['total_imported']} 个文件"
@@ -318,74 +595,148 @@ class FileImportWorkflow:
             
         return result
     
-    def _get_existing_file_md5s(self, directory: Path) -> Set[str]:
-        """获取目录中已存在文件的MD5集合"""
-        md5_set = set()
+    def _index_existing_by_size(self, directory: Path) -> Dict[int, List[str]]:
+        """按文件大小索引目录中已存在的txt文件（大小取自目录项，无需读取文件内容）"""
+        size_index = {}
         
         try:
-            for file_path in directory.glob("*.txt"):
-                if file_path.is_file():
-                    md5 = self._calculate_md5(file_path)
-                    if md5:
-                        md5_set.add(md5)
-        except:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(".txt") and entry.is_file():
+                        size_index.setdefault(entry.stat().st_size, []).append(entry.path)
+        except OSError:
             pass
             
-        return md5_set
+        return size_index
     
-    def _generate_unique_filename(self, directory: Path, original_name: str) -> str:
-        """生成唯一且标准化的文件名，避免冲突"""
+    def _prehash_size_collisions(self, valid_files: List[Dict], size_index: Dict[int, List[str]],
+                                 checksum_cache: Dict[str, str], index_store: _IndexStore):
+        """
+        并发计算可能重复的文件的校验和
+        
+        与已有文件大小相同、或与本次其他待导入文件大小相同的源文件，以及与之大小相同的已有文件
+        （索引中没有有效记录时）在线程池中计算；结果和索引在主线程中更新。
+        """
+        size_counts = Counter(file_info["size"] for file_info in valid_files)
+        sources = [
+            file_info for file_info in valid_files
+            if not file_info["checksum"] and (file_info["size"] in size_index or size_counts[file_info["size"]] > 1)
+        ]
+        if not sources:
+            return
+        
+        stale = []
+        for size in {file_info["size"] for file_info in sources}:
+            for path_str in size_index.get(size, ()):
+                if path_str in checksum_cache:
+                    continue
+                checksum, st = index_store.lookup(path_str)
+                if checksum is not None:
+                    checksum_cache[path_str] = checksum
+                elif st is not None:
+                    stale.append((path_str, st))
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            source_checksums = executor.map(_calculate_checksum, [file_info["path"] for file_info in sources])
+            existing_checksums = executor.map(_calculate_checksum, [path_str for path_str, _ in stale])
+            
+            for file_info, checksum in zip(sources, source_checksums):
+                file_info["checksum"] = checksum
+            for (path_str, st), checksum in zip(stale, existing_checksums):
+                checksum_cache[path_str] = checksum
+                if checksum:
+                    index_store.add(os.path.basename(path_str), st.st_size, st.st_mtime_ns, checksum)
+    
+    def _is_duplicate(self, checksum: str, candidates: List[str], checksum_cache: Dict[str, str],
+                      pending_ops: Dict, index_store: Optional[_IndexStore] = None) -> bool:
+        """
+        判断校验和是否与候选文件之一相同
+        
+        候选文件是本次导入中提交的复制/移动目标时，先等待操作完成，操作失败的目标不算已存在。
+        """
+        for candidate in candidates:
+            future = pending_ops.get(candidate)
+            if future is not None:
+                if checksum_cache.get(candidate, checksum) != checksum:
+                    continue
+                # exception() 会等待操作完成
+                if future.exception() is not None:
+                    continue
+            if self._cached_checksum(candidate, checksum_cache, index_store) == checksum:
+                return True
+        return False
+    
+    @staticmethod
+    def _cached_checksum(path_str: str, checksum_cache: Dict[str, str],
+                    index_store: Optional[_IndexStore] = None) -> str:
+        """计算文件校验和，同一次导入中每个文件只计算一次，有索引时优先使用索引中的记录"""
+        checksum = checksum_cache.get(path_str)
+        if checksum is None:
+            if index_store is not None:
+                checksum = index_store.get_or_compute(path_str)
+            else:
+                checksum = _calculate_checksum(path_str)
+            checksum_cache[path_str] = checksum
+        return checksum
+    
+    @staticmethod
+    def _list_existing_names(directory: Path) -> Set[str]:
+        """一次列出目录中已有的文件名（统一转为小写比较，兼容不区分大小写的文件系统）"""
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name.casefold() for entry in entries}
+        except OSError:
+            return set()
+    
+    def _generate_unique_filename(self, directory: Path, original_name: str,
+                                  existing_names: Optional[Set[str]] = None) -> str:
+        """
+        生成唯一且标准化的文件名，避免冲突
+        
+        Args:
+            directory: 目标目录
+            original_name: 原文件名
+            existing_names: 目录中已有的文件名集合（小写），批量导入时传入以免每次都查询文件系统；
+                生成的文件名会加入该集合
+        """
+        if existing_names is None:
+            existing_names = self._list_existing_names(directory)
+        
         # 1. 先进行文件名标准化
         standardized_name = self._standardize_filename(original_name)
         
         # 2. 检查标准化后的文件名是否存在冲突
-        target_path = directory / standardized_name
-        if not target_path.exists():
-            return standardized_name
-        
-        # 3. 如果有冲突，生成带编号的文件名
-        base_name = Path(standardized_name).stem
-        extension = Path(standardized_name).suffix
+        new_name = standardized_name
+        if new_name.casefold() in existing_names:
+            # 3. 如果有冲突，生成带编号的文件名
+            base_name, extension = os.path.splitext(standardized_name)
+            
+            counter = 1
+            while True:
+                new_name = f"{base_name}_{counter}{extension}"
+                if new_name.casefold() not in existing_names:
+                    break
+                counter += 1
+                
+                # 防止无限循环
+                if counter > 1000:
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    new_name = f"{base_name}_{timestamp}{extension}"
+                    break
         
-        counter = 1
-        while True:
-            new_name = f"{base_name}_{counter}{extension}"
-            new_path = directory / new_name
-            if not new_path.exists():
-                return new_name
-            counter += 1
-            
-            # 防止无限循环
-            if counter > 1000:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                return f"{base_name}_{timestamp}{extension}"
+        existing_names.add(new_name.casefold())
+        return new_name
     
     def _standardize_filename(self, filename: str) -> str:
         """标准化文件名"""
-        path_obj = Path(filename)
-        stem = path_obj.stem
-        suffix = path_obj.suffix
+        stem, suffix = os.path.splitext(filename)
         
         # 标准化扩展名：统一转换为小写
-        if suffix.upper() in ['.TXT']:
-            suffix = '.txt'
-        elif suffix.upper() in ['.MD']:
-            suffix = '.md'
-        else:
-            suffix = suffix.lower()
-        
-        # 清理文件名中的问题字符（可选，目前保持简单）
-        # 移除文件名首尾空格
-        stem = stem.strip()
-        
-        # 处理连续空格
-        import re
-        stem = re.sub(r'\s+', ' ', stem)
+        suffix = suffix.lower()
         
-        # 移除Windows文件系统不支持的字符
-        invalid_chars = '<>:"|?*'
-        for char in invalid_chars:
-            stem = stem.replace(char, '')
+        # 清理文件名中的问题字符：移除首尾空格、合并连续空格，
+        # 再通过转换表一次移除Windows文件系统不支持的字符
+        stem = _WS_RE.sub(' ', stem.strip()).translate(_INVALID_TRANS)
         
         return f"{stem}{suffix}"
     
@@ -404,7 +755,8 @@ class FileImportWorkflow:
                     "total_imported": import_result["total_imported"],
                     "failed_count": len(import_result["failed_files"]),
                     "skipped_count": len(import_result["skipped_files"]),
-                    "import_mode": import_result["import_mode"]
+                    "import_mode": import_result["import_mode"],
+                    "hash_kind": _HASH_KIND
                 },
                 "imported_files": import_result["imported_files"],
                 "failed_files": import_result["failed_files"],
@@ -412,9 +764,7 @@ class FileImportWorkflow:
                 "errors": import_result["errors"]
             }
             
-            import json
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            write_json_atomic(report_file, report)
                 
         except Exception as e:
             self.logger.error(f"创建导入报告失败: {e}")
@@ -443,9 +793,9 @@ class FileImportWorkflow:
             
             # 统计待分类文件
             if pending_dir.exists():
-                txt_files = list(pending_dir.glob("*.txt"))
-                stats["pending_count"] = len(txt_files)
-                stats["pending_total_size"] = sum(f.stat().st_size for f in txt_files)
+                txt_entries = list(_iter_files(pending_dir, recursive=False, suffix=".txt"))
+                stats["pending_count"] = len(txt_entries)
+                stats["pending_total_size"] = sum(entry.stat().st_size for entry in txt_entries)
             
             # 获取最近的导入记录
             if logs_dir.exists():
@@ -454,7 +804,6 @@ class FileImportWorkflow:
                 
                 for report_file in import_reports[:5]:  # 最近5次导入
                     try:
-                        import json
                         with open(report_file, 'r', encoding='utf-8') as f:
                             report_data = json.load(f)
                             stats["recent_imports"].append({
@@ -81,6 +81,15 @@ class InitializationWorkflow:
         if self.progress_callback:
             self.progress_callback(progress, message)
     
+    @staticmethod
+    def _is_non_empty_dir(directory: Path) -> bool:
+        """判断目录是否存在且不为空（读取到第一个目录项即停止）"""
+        try:
+            with os.scandir(directory) as entries:
+                return next(entries, None) is not None
+        except (FileNotFoundError, NotADirectoryError):
+            return False
+    
     def create_novel_library(self, library_path: str) -> Dict:
         """
         创建小说库目录结构
@@ -103,7 +112,7 @@ class InitializationWorkflow:
             library_dir = Path(library_path)
             
             # 检查目录是否存在
-            if library_dir.exists() and any(library_dir.iterdir()):
+            if self._is_non_empty_dir(library_dir):
                 result["message"] = "目标目录已存在且不为空，请选择空目录或不存在的目录"
                 return result
             
@@ -111,20 +120,23 @@ class InitializationWorkflow:
             library_dir.mkdir(parents=True, exist_ok=True)
             self._update_progress(10, "创建根目录...")
             
-            # 创建子目录
-            total_dirs = len(self.standard_dirs)
-            for i, dir_name in enumerate(self.standard_dirs):
-                dir_path = library_dir / dir_name
-                dir_path.mkdir(exist_ok=True)
-                result["created_dirs"].append(str(dir_path))
-                
-                # 为特殊目录创建说明文件
-                if dir_name == "00-二次确认":
-                    self._create_secondary_check_readme(dir_path)
-                    result["created_files"].append(str(dir_path / "目录说明.txt"))
-                
-                progress = 10 + (i + 1) / total_dirs * 60
-                self._update_progress(progress, f"创建目录: {dir_name}")
+            # 创建子目录：根目录已确认为空（或刚创建），子目录都不存在，直接逐个 mkdir
+            library_dir_str = str(library_dir)
+            for dir_name in self.standard_dirs:
+                dir_path = os.path.join(library_dir_str, dir_name)
+                try:
+                    os.mkdir(dir_path)
+                except FileExistsError:
+                    pass
+                result["created_dirs"].append(dir_path)
+            
+            # 为特殊目录创建说明文件
+            secondary_dir = library_dir / "00-二次确认"
+            if "00-二次确认" in self.standard_dirs:
+                self._create_secondary_check_readme(secondary_dir)
+                result["created_files"].append(str(secondary_dir / "目录说明.txt"))
+            
+            self._update_progress(70, f"已创建 {len(self.standard_dirs)} 个分类目录")
             
             # 创建README文件
             self._update_progress(75, "创建README文件...")